@@ -10,18 +10,26 @@ class ConfidenceRestorer:
     def __init__(self):
         self.trie = PrefixTrie()
         self.text_processor = TextProcessor()
+        self.max_display = 10  # Number of candidates shown per word
     
-    def restore_with_confidence(self, word_with_wildcards):
+    def restore_with_confidence(self, word_with_wildcards, top_k=None, show_all=False):
         """
         Restore a wildcard word using matches from the trie and show confidence scores.
+        Only the top_k most frequent candidates (default self.max_display) are listed;
+        pass show_all=True to list every match.
         """
-        matches = self.trie.find_all_matches_with_freq(word_with_wildcards)
+        if show_all:
+            matches, total_frequency, match_count = self.trie.find_top_k_matches(
+                word_with_wildcards, None, with_total=True)
+        else:
+            # Totals come from the trie's subtree aggregates, so ambiguous patterns stay cheap
+            total_frequency, match_count, matches = self.trie.match_summary(
+                word_with_wildcards, top_k or self.max_display)
         if not matches:
             print(f"No matches found for '{word_with_wildcards}'.")
             return
 
-        # total_frequency is the sum of frequencies of all matches
-        total_frequency = sum(freq for _, freq in matches)
+        # total_frequency is the sum of frequencies of all matches, not only the ones shown
 
         # Display the results
         print(f"Restoring: {word_with_wildcards}")
@@ -29,6 +37,8 @@ class ConfidenceRestorer:
         for word, freq in matches:
             confidence = (freq / total_frequency) * 100 if total_frequency > 0 else 0
             print(f" - {word} ({confidence:.2f}%)")
+        if match_count > len(matches):
+            print(f" ... and {match_count - len(matches)} more")
 
 
     def restore_confidence_menu(self):
@@ -46,9 +56,12 @@ class ConfidenceRestorer:
                 choice = input("Enter your choice (1-2): ").strip()
                 
                 if choice == '1':
-                    word_with_wildcards = input("Enter the word with wildcards (e.g., 'c*t'): ").strip()
+                    # Add 'all' after the word to list every candidate, e.g. 'c*t all'
+                    args = input("Enter the word with wildcards (e.g., 'c*t'): ").split()
+                    word_with_wildcards = args[0] if args else ""
                     if word_with_wildcards:
-                        self.restore_with_confidence(word_with_wildcards)
+                        show_all = len(args) > 1 and args[1].lower() == 'all'
+                        self.restore_with_confidence(word_with_wildcards, show_all=show_all)
                     else:
                         print("Invalid input. Please enter a word with wildcards.")
                         
@@ -5,6 +5,8 @@
 
 from trie import PrefixTrie
 
+REPORT_LIMIT = 10  # Unknown words / bad lines listed after a bulk update
+
 class ManualFrequencyEditor:
     def __init__(self):
         self.trie = PrefixTrie()
@@ -18,22 +20,68 @@ class ManualFrequencyEditor:
             return False
 
         word = word.lower().strip()
-        node = self.trie.root
-
-        for char in word:
-            if char not in node.children:
-                print(f"'{word}' not found in trie.")
-                return False
-            node = node.children[char]
+        old_freq = self.trie.get_frequency(word)
 
-        if node.is_terminal:
-            old_freq = node.frequency
-            node.frequency = new_freq
+        if old_freq is not None:
+            self.trie.set_frequency(word, new_freq)
             print(f"Frequency for '{word}' updated from {old_freq} to {new_freq}.")
             return True
-        else:
+        elif self.trie.starts_with(word):
             print(f"'{word}' is a prefix, not a complete word.")
             return False
+        else:
+            print(f"'{word}' not found in trie.")
+            return False
+
+    def bulk_update_frequencies(self, source):
+        """
+        Applies many frequency updates in one pass.
+        source is a filename or an iterable of lines, each either 'word,new_freq'
+        (set the frequency) or 'word,+delta' / 'word,-delta' (adjust it).
+        Unknown words, malformed lines and updates that would make a frequency
+        negative are reported and skipped.
+        Returns (changed_count, unknown_words, bad_lines).
+        """
+        if isinstance(source, str):
+            try:
+                with open(source, 'r', encoding='utf-8') as file:
+                    return self.bulk_update_frequencies(file)
+            except FileNotFoundError:
+                print(f"Error: File '{source}' not found.")
+                return 0, [], []
+
+        bad_lines = []
+
+        def parse(lines):
+            for line_number, line in enumerate(lines, start=1):
+                word, comma, value = line.strip().partition(',')
+                word = word.strip()
+                value = value.strip()
+                if not word and not comma:
+                    continue  # blank line
+                try:
+                    amount = int(value)
+                except ValueError:
+                    amount = None
+                if not word or amount is None:
+                    bad_lines.append((line_number, line.rstrip('\n')))
+                    continue
+                yield word, amount, value[0] in '+-'
+
+        changed, unknown, rejected = self.trie.update_frequencies(parse(source))
+
+        print(f"Bulk update complete: {changed} frequencies changed.")
+        if unknown:
+            print(f"{len(unknown)} word(s) not found in trie: {', '.join(unknown[:REPORT_LIMIT])}"
+                  f"{' ...' if len(unknown) > REPORT_LIMIT else ''}")
+        if rejected:
+            print(f"{len(rejected)} update(s) would make a frequency negative and were skipped: "
+                  f"{', '.join(f'{word},{amount:+d}' for word, amount, _ in rejected[:REPORT_LIMIT])}")
+        if bad_lines:
+            print(f"{len(bad_lines)} malformed line(s) skipped:")
+            for line_number, line in bad_lines[:REPORT_LIMIT]:
+                print(f"  line {line_number}: {line!r}")
+        return changed, unknown, bad_lines
 
     def display_word_frequencies(self):
         """
@@ -62,10 +110,11 @@ class ManualFrequencyEditor:
                 print("-"*50)
                 print("1. Edit Word Frequency")
                 print("2. Display All Word Frequencies")
-                print("3. Exit to Main Menu")
+                print("3. Bulk Update Frequencies from File")
+                print("4. Exit to Main Menu")
                 print("-"*50)
 
-                choice = input("Enter your choice (1-3): ").strip()
+                choice = input("Enter your choice (1-4): ").strip()
 
                 if choice == '1':
                     word = input("Enter the word to edit frequency: ").strip()
@@ -87,11 +136,19 @@ class ManualFrequencyEditor:
                     self.display_word_frequencies()
                     
                 elif choice == '3':
+                    # One 'word,new_freq' or 'word,+delta' per line
+                    filename = input("Enter filename of frequency updates: ").strip()
+                    if filename:
+                        self.bulk_update_frequencies(filename)
+                    else:
+                        print("Invalid filename.")
+
+                elif choice == '4':
                     print("Returning to Main Menu...")
                     break
                     
                 else:
-                    print("Invalid choice. Please enter a number between 1 and 3.")
+                    print("Invalid choice. Please enter a number between 1 and 4.")
                     
             except KeyboardInterrupt:
                 print("\nReturning to Main Menu...")
@@ -0,0 +1,236 @@
+# bench_trie.py
+# Micro-benchmarks for PrefixTrie operations
+# Shu Zhi and Ashley
+# DAAA/2A/03
+#
+# Usage (from the repository root):
+#   python benchmarks/bench_trie.py run --sizes 10000 100000 --output before.json
+#   python benchmarks/bench_trie.py run --sizes 10000 100000 --output after.json
+#   python benchmarks/bench_trie.py compare before.json after.json --threshold 0.10
+#   python benchmarks/bench_trie.py run --sizes 100000 --impl bitmap --output bitmap.json
+#
+# 'run' builds synthetic dictionaries (random words, Zipfian frequencies) of each
+# size and times the core operations (for the prefix trie, also the build time
+# and memory of the short-pattern answer table); 'compare' flags operations whose
+# time per operation grew by more than the threshold and exits with status 1 if any did.
+
+import argparse
+import json
+import os
+import platform
+import random
+import string
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trie import PrefixTrie
+from radix_trie import RadixTrie
+from bitmap_index import BitmapIndex, np
+
+# Trie implementations that can be benchmarked (--impl); caching is off so every query is measured
+IMPLEMENTATIONS = {
+    "prefix": lambda: PrefixTrie(cache_size=0),
+    "radix": RadixTrie,
+}
+if np is not None:
+    IMPLEMENTATIONS["bitmap"] = BitmapIndex
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 5_000_000]
+ZIPF_EXPONENT = 1.07  # Close to the exponent observed for English word counts
+MAX_FREQUENCY = 10_000_000_000  # Frequency of the rank-1 word (stopwordsFreq.txt tops 9 billion)
+WILDCARD_DENSITIES = [0.25, 0.5]
+WILDCARD_POSITIONS = ["leading", "middle", "trailing", "scattered"]
+ANSWER_TABLE_LENGTH = 4  # Longest pattern precomputed by PrefixTrie.enable_answer_table
+
+def generate_dictionary(size, seed=0):
+    """
+    Return a list of `size` distinct lowercase words with Zipfian frequencies,
+    most frequent first. Word lengths follow a rough English distribution (2-14).
+    """
+    rng = random.Random(seed)
+    lengths = list(range(2, 15))
+    weights = [3, 8, 12, 14, 14, 12, 10, 8, 6, 5, 4, 2, 2]
+    words = set()
+    while len(words) < size:
+        length = rng.choices(lengths, weights)[0]
+        words.add("".join(rng.choices(string.ascii_lowercase, k=length)))
+    words = list(words)
+    rng.shuffle(words)
+    return [(word, max(1, int(MAX_FREQUENCY / rank ** ZIPF_EXPONENT)))
+            for rank, word in enumerate(words, start=1)]
+
+def make_pattern(word, density, position, rng):
+    """Replace about density * len(word) characters of word with '*' at the given position."""
+    count = max(1, round(len(word) * density))
+    if position == "leading":
+        indexes = range(count)
+    elif position == "trailing":
+        indexes = range(len(word) - count, len(word))
+    elif position == "middle":
+        start = (len(word) - count) // 2
+        indexes = range(start, start + count)
+    else:
+        indexes = rng.sample(range(len(word)), count)
+    chars = list(word)
+    for index in indexes:
+        chars[index] = "*"
+    return "".join(chars)
+
+def time_operation(func, items):
+    """Call func(item) for every item; return timing as a dictionary."""
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    elapsed = time.perf_counter() - start
+    return {"ops": len(items), "total_s": elapsed, "per_op_us": elapsed / max(1, len(items)) * 1e6}
+
+def benchmark_size(size, queries, pattern_queries, seed, impl="prefix"):
+    """
+    Run every benchmark for one dictionary size. Returns ({operation: timing},
+    {structure: memory info}) for the structures whose memory is reported.
+    """
+    rng = random.Random(seed + size)
+    pairs = generate_dictionary(size, seed)
+    results = {}
+    memory = {}
+    make_trie = IMPLEMENTATIONS[impl]
+
+    trie = make_trie()
+    results["add_keyword"] = time_operation(lambda pair: trie.add_keyword(*pair), pairs)
+
+    sample = [word for word, _ in rng.sample(pairs, min(queries, size))]
+    absent = ["".join(rng.choices(string.ascii_lowercase, k=len(word))) + "q" for word in sample]
+    if hasattr(trie, "compile"):
+        # Engines that index lazily: time the build separately from the first query
+        results["compile"] = time_operation(lambda _: trie.compile(), [None])
+    results["search_keyword/hit"] = time_operation(trie.search_keyword, sample)
+    results["search_keyword/miss"] = time_operation(trie.search_keyword, absent)
+
+    for density in WILDCARD_DENSITIES:
+        for position in WILDCARD_POSITIONS:
+            words = [word for word, _ in rng.sample(pairs, min(pattern_queries, size))]
+            patterns = [make_pattern(word, density, position, rng) for word in words]
+            label = f"density={density},position={position}"
+            results[f"find_all_matches_with_freq/{label}"] = time_operation(
+                trie.find_all_matches_with_freq, patterns)
+            results[f"find_best_match/{label}"] = time_operation(trie.find_best_match, patterns)
+
+    if hasattr(trie, "complete"):
+        prefixes = [word[:rng.randint(1, len(word))] for word in sample]
+        results["complete"] = time_operation(trie.complete, prefixes)
+        if hasattr(trie, "enable_completions"):
+            results["completions/build"] = time_operation(lambda _: trie.enable_completions(), [None])
+            results["complete,lists"] = time_operation(trie.complete, prefixes)
+            trie.disable_completions()  # Keep the timings below comparable with earlier reports
+
+    if hasattr(trie, "enable_answer_table"):
+        # Short patterns such as 'o*', 'he*' or 'a*l': walked, then answered from the precomputed table
+        short = [word for word, _ in pairs if len(word) <= ANSWER_TABLE_LENGTH]
+        patterns = [make_pattern(word, 0.5, "scattered", rng)
+                    for word in rng.sample(short, min(queries, len(short)))]
+        results["find_best_match/short"] = time_operation(trie.find_best_match, patterns)
+        results["answer_table/build"] = time_operation(
+            lambda _: trie.enable_answer_table(ANSWER_TABLE_LENGTH), [None])
+        results["find_best_match/short,table"] = time_operation(trie.find_best_match, patterns)
+        memory["answer_table"] = trie.answer_table_info()
+        trie.disable_answer_table()  # Keep the timings below comparable with earlier reports
+
+    results["get_all_words"] = time_operation(lambda _: trie.get_all_words(), [None])
+
+    deleted = [word for word, _ in rng.sample(pairs, min(queries, size))]
+    results["delete_keyword"] = time_operation(trie.delete_keyword, deleted)
+    del trie
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "keywords.txt")
+        with open(filename, "w", encoding="utf-8") as file:
+            for word, frequency in pairs:
+                file.write(f"{word},{frequency}\n")
+        loader = make_trie()
+        results["read_keywords_from_file"] = time_operation(loader.read_keywords_from_file, [filename])
+    return results, memory
+
+def run(args):
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "impl": args.impl,
+            "queries": args.queries,
+            "pattern_queries": args.pattern_queries,
+        },
+        "results": {},
+        "memory": {},
+    }
+    for size in args.sizes:
+        print(f"Benchmarking {size:,} words...")
+        results, memory = benchmark_size(size, args.queries, args.pattern_queries, args.seed, args.impl)
+        report["results"][str(size)] = results
+        report["memory"][str(size)] = memory
+        for name, timing in results.items():
+            print(f"  {name:<60} {timing['per_op_us']:>14.2f} us/op")
+        for name, info in memory.items():
+            print(f"  {name + ' memory':<60} {info['bytes'] / 2**20:>14.2f} MB"
+                  f"  ({info['patterns']:,} patterns)")
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to '{args.output}'.")
+
+def compare(args):
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)["results"]
+    with open(args.candidate, encoding="utf-8") as file:
+        candidate = json.load(file)["results"]
+
+    regressions = 0
+    for size in sorted(set(baseline) & set(candidate), key=int):
+        print(f"{int(size):,} words:")
+        for name in sorted(set(baseline[size]) & set(candidate[size])):
+            old = baseline[size][name]["per_op_us"]
+            new = candidate[size][name]["per_op_us"]
+            change = (new - old) / old if old else 0.0
+            flag = ""
+            if change > args.threshold:
+                flag = "  <-- REGRESSION"
+                regressions += 1
+            elif change < -args.threshold:
+                flag = "  (faster)"
+            print(f"  {name:<60} {old:>12.2f} -> {new:>12.2f} us/op  {change:+7.1%}{flag}")
+    print(f"\n{regressions} regression(s) above {args.threshold:.0%}.")
+    return 1 if regressions else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="PrefixTrie micro-benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks and write a JSON report")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    run_parser.add_argument("--queries", type=int, default=2000,
+                            help="lookups/deletes per size")
+    run_parser.add_argument("--pattern-queries", type=int, default=100,
+                            help="wildcard queries per density/position combination")
+    run_parser.add_argument("--seed", type=int, default=1507)
+    run_parser.add_argument("--impl", choices=sorted(IMPLEMENTATIONS), default="prefix",
+                            help="trie implementation to benchmark")
+    run_parser.add_argument("--output", default="bench_results.json")
+
+    compare_parser = commands.add_parser("compare", help="compare two JSON reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="relative slowdown reported as a regression")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+# bitmap_index.py
+# Positional bitmap index: an alternative wildcard matching engine to the prefix trie
+# Shu Zhi and Ashley
+# DAAA/2A/03
+
+import heapq
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; only this engine needs it
+    np = None
+
+from trie import CharClass, compile_pattern, parse_keyword_blocks
+
+class _LengthGroup:
+    """
+    All words of one length, ranked by frequency (descending) then alphabetically,
+    so a word's id is also its rank. bitmaps[position][char] is a packed bit
+    array with bit i set if word i has char at that position.
+    """
+    def __init__(self, pairs):
+        pairs.sort(key=lambda x: (-x[1], x[0]))
+        self.words = [word for word, _ in pairs]
+        self.frequencies = np.array([freq for _, freq in pairs], dtype=np.int64)
+        self.count = len(pairs)
+        length = len(self.words[0])
+        # One row of code points per word
+        chars = np.frombuffer("".join(self.words).encode("utf-32-le"), dtype=np.uint32)
+        chars = chars.reshape(self.count, length)
+        self.bitmaps = []
+        for position in range(length):
+            column = chars[:, position]
+            self.bitmaps.append({chr(code): np.packbits(column == code)
+                                 for code in np.unique(column).tolist()})
+
+    def match(self, tokens):
+        # Packed bitmap of the words matching a gap-free pattern's tokens, or None if every word matches
+        result = None
+        for position, char in enumerate(tokens):
+            if char == '*':
+                continue
+            if isinstance(char, CharClass):
+                # Words with any of the class's characters here
+                present = [bitmap for c, bitmap in self.bitmaps[position].items() if char.contains(c)]
+                bitmap = np.bitwise_or.reduce(present) if present else None
+            else:
+                bitmap = self.bitmaps[position].get(char)
+            if bitmap is None:
+                return np.zeros((self.count + 7) // 8, dtype=np.uint8)  # No word has char here
+            result = bitmap.copy() if result is None else np.bitwise_and(result, bitmap, out=result)
+        return result
+
+    def ids(self, bitmap, k=None):
+        # Word ids (best first) set in bitmap, only the first k if k is given
+        if bitmap is None:
+            return range(self.count if k is None else min(k, self.count))
+        ids = np.flatnonzero(np.unpackbits(bitmap, count=self.count))
+        return ids if k is None else ids[:k]
+
+class BitmapIndex:
+    """
+    Wildcard matching engine that does not walk a trie. Words are grouped by
+    length, and each group keeps, for every (position, character), a NumPy
+    bitmap of the words with that character there. A pattern such as 't**t'
+    becomes an AND of the bitmaps of its fixed characters (a class such as
+    '[ce]' ORs the bitmaps of its characters first); since word ids are
+    ranks, the matches come out already ordered and the best match is the
+    first set bit. Patterns with gaps (%) match words of several lengths; they
+    are checked word by word against each long enough group instead.
+    Supports the query API of PrefixTrie: add_keyword, delete_keyword,
+    search_keyword, get_frequency, find_all_matches_with_freq,
+    find_best_match, find_top_k_matches and get_all_words. Edits only update
+    a dictionary; the bitmaps are rebuilt on the next wildcard query.
+    Requires NumPy.
+    """
+    def __init__(self):
+        if np is None:
+            raise ImportError("BitmapIndex requires NumPy (pip install numpy).")
+        self.frequencies = {}  # word -> frequency
+        self.groups = None  # length -> _LengthGroup, None until (re)compiled
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        """Build an index from an iterable of (word, frequency) pairs."""
+        index = cls()
+        for word, frequency in pairs:
+            index.add_keyword(word, frequency)
+        return index
+
+    @classmethod
+    def from_trie(cls, trie):
+        """Build an index holding the words of a PrefixTrie (or any dictionary with get_all_words)."""
+        return cls.from_pairs(trie.get_all_words())
+
+    def add_keyword(self, word, frequency=1):
+        """
+        Add a word with given frequency, or increment its frequency if present.
+        Time Complexity: O(m) where m is the length of the word
+        """
+        if not word:
+            return
+        word = word.lower().strip()
+        self.frequencies[word] = self.frequencies.get(word, 0) + frequency
+        self.groups = None
+
+    def delete_keyword(self, word):
+        """
+        Delete a word. Returns True if it was deleted, False if it doesn't exist.
+        Time Complexity: O(m) where m is the length of the word
+        """
+        if not word or self.frequencies.pop(word.lower().strip(), None) is None:
+            return False
+        self.groups = None
+        return True
+
+    def search_keyword(self, word):
+        """Return True if word is in the index. Time Complexity: O(1) average"""
+        return bool(word) and word.lower().strip() in self.frequencies
+
+    def get_frequency(self, word):
+        """Return the frequency of word, or None if it is not in the index."""
+        return self.frequencies.get(word.lower().strip()) if word else None
+
+    def compile(self):
+        """
+        Build the per-length bitmaps if an edit made them stale.
+        Time Complexity: O(L * c * n) where c is the number of distinct characters per position
+        """
+        if self.groups is not None:
+            return
+        by_length = {}
+        for word, frequency in self.frequencies.items():
+            by_length.setdefault(len(word), []).append((word, frequency))
+        self.groups = {length: _LengthGroup(pairs) for length, pairs in by_length.items()}
+
+    def _select(self, pattern, k=None):
+        self.compile()
+        pattern = compile_pattern(pattern)
+        if pattern.has_gap:
+            return self._select_gap(pattern, k)
+        group = self.groups.get(pattern.length)
+        if group is None:
+            return []
+        ids = group.ids(group.match(pattern.tokens), k)
+        return [(group.words[i], int(group.frequencies[i])) for i in ids]
+
+    def _select_gap(self, pattern, k=None):
+        # Scan the groups a gap pattern can match; each is already ranked, so merge them
+        shortest = sum(1 for token in pattern.tokens if not isinstance(token, tuple))
+        ranked = ([(word, int(group.frequencies[i])) for i, word in enumerate(group.words)
+                   if pattern.matches(word)]
+                  for length, group in self.groups.items() if length >= shortest)
+        matches = list(heapq.merge(*ranked, key=lambda x: (-x[1], x[0])))
+        return matches if k is None else matches[:k]
+
+    def find_all_matches_with_freq(self, pattern):
+        """
+        Find all words matching a pattern with wildcards (*), classes ([ce], [^ce])
+        and gaps (%), as (word, frequency) sorted by frequency (descending),
+        then alphabetically.
+        Time Complexity: O(f * n / w) for f fixed characters over n words of that length
+        """
+        return self._select(pattern)
+
+    def find_top_k_matches(self, pattern, k=None):
+        """Return the k best matches of pattern, in the order of find_all_matches_with_freq."""
+        return self._select(pattern, k)
+
+    def find_best_match(self, pattern):
+        """
+        Find the (word, frequency) with the highest frequency matching a pattern
+        with wildcards (*), ties broken alphabetically, or None if no match.
+        """
+        matches = self._select(pattern, 1)
+        return matches[0] if matches else None
+
+    def get_all_words(self):
+        """
+        Get all words with their frequencies, sorted by frequency (descending)
+        then alphabetically.
+        """
+        return sorted(self.frequencies.items(), key=lambda x: (-x[1], x[0]))
+
+    def memory_bytes(self):
+        """Return the number of bytes held by the compiled bitmaps and frequency arrays."""
+        self.compile()
+        total = 0
+        for group in self.groups.values():
+            total += group.frequencies.nbytes
+            total += sum(bitmap.nbytes for bitmaps in group.bitmaps for bitmap in bitmaps.values())
+        return total
+
+    def read_keywords_from_file(self, filename):
+        """
+        Read keywords from a file and build the index.
+        File format: word,frequency (one per line)
+        Clears existing words before loading new data. Malformed lines are skipped and reported.
+        """
+        try:
+            self.frequencies = {}
+            self.groups = None
+            malformed = []
+            with open(filename, 'r', encoding='utf-8') as file:
+                for word, frequency in parse_keyword_blocks(file, malformed):
+                    self.frequencies[word] = self.frequencies.get(word, 0) + frequency
+            if malformed:
+                print(f"Warning: skipped {len(malformed)} malformed line(s) in '{filename}'.")
+
+        except FileNotFoundError:
+            print(f"Error: File '{filename}' not found.")
+        except Exception as e:
+            print(f"Error reading file: {e}")
+
+    def __len__(self):
+        """Return the number of words in the index."""
+        return len(self.frequencies)
+
+    def __str__(self):
+        return f"BitmapIndex(size={len(self.frequencies)})"
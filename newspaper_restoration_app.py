@@ -21,6 +21,7 @@ class NewspaperRestorationApp:
         self.text_processor = TextProcessor()
         self.conf_restorer = ConfidenceRestorer()
         self.freq_editor = ManualFrequencyEditor()
+        self.max_candidates = 10  # Matches listed by '$' unless a limit is given
         
     def display_main_menu(self):
         print("\n" + "*"*65)
@@ -47,15 +48,17 @@ class NewspaperRestorationApp:
     def construct_edit_trie_menu(self):
         print("\n" + "-"*60)
         print("Construct/Edit Trie Commands:")
-        print("    '+','-','?','#','@','~','=','!','\\'")
+        print("    '+','-','?','$','#','@','~','=','&','!','\\'")
         print("-"*60)
         print("    +sunshine       (add a keyword)")
         print("    -moonlight      (delete a keyword)")
         print("    ?rainbow        (find a keyword)")
+        print("    $sun [k]        (complete a prefix, best k keywords)")
         print("    #               (display Trie)")
         print("    @               (write Trie to file)")
         print("    ~               (read keywords from file to make Trie)")
         print("    =               (write keywords from Trie to file)")
+        print("    &               (memory and structure report)")
         print("    !               (print instructions)")
         print("    \\               (exit)")
         print("-"*60+"\n")
@@ -97,6 +100,9 @@ class NewspaperRestorationApp:
                     else:
                         print("Invalid keyword.")
                         
+                elif command == '$':
+                    self.complete_command(keyword or input("Enter prefix to complete: ").strip().lower())
+
                 elif command == '#':
                     print("\nCurrent Trie:")
                     self.trie.display_trie()
@@ -125,6 +131,9 @@ class NewspaperRestorationApp:
                     else:
                         print("Invalid filename.")
                         
+                elif command == '&':
+                    self.memory_report_command()
+
                 elif command == '!':
                     self.construct_edit_trie_menu()
                     
@@ -144,14 +153,17 @@ class NewspaperRestorationApp:
     def predict_restore_text_menu(self):
         print("-" * 63)
         print("\nPredict/Restore Text Commands:")
-        print("'~', '#', '$', '?', '&', '@', '!', '\'")
+        print("'~', '#', '$', '?', '&', '@', '^', '!', '\'")
         print("-" * 63)
         print("~ : Read keywords from a file to make a new prefix trie")
         print("# : Display the current prefix trie on the screen")
-        print("$ : List all possible matching keywords")
+        print("$ : List the top matching keywords ('$pattern all' for every match)")
         print("? : Restore a word using the best keyword match")
+        print("    (patterns: '*' = one character, '[ce]' = c or e, '[^ce]' = not c or e,")
+        print("     '%' = any run, '%{m,n}' = m to n characters)")
         print("& : Restore a text using all matching keywords")
         print("@ : Restore a text using the best keyword matches")
+        print("^ : Query statistics ('^on', '^off', '^' to show stats and slowest patterns)")
         print("! : Print instructions for various commands")
         print("\\ : Exit and return to main menu")
         
@@ -172,17 +184,23 @@ class NewspaperRestorationApp:
                     self.trie.display_trie()
                     
                 elif command.startswith('$'):
-                    pattern = command[1:].strip().lower() if len(command) > 1 else None
-                    if not pattern:
-                        pattern = input("Enter pattern with wildcards (*): ").strip().lower()
+                    # Optional limit after the pattern: '$t**t 20' or '$t**t all'
+                    args = command[1:].split()
+                    if not args:
+                        args = input("Enter pattern with wildcards (* one char, [ce] class, % any run): ").split()
+                    pattern = args[0].lower() if args else None
+                    limit = args[1].lower() if len(args) > 1 else str(self.max_candidates)
 
-                    if pattern:
-                        # Get matches with frequencies
-                        matches = self.trie.find_all_matches_with_freq(pattern)
+                    if pattern and (limit == 'all' or limit.isdigit()):
+                        # Get the top matches with frequencies
+                        k = None if limit == 'all' else int(limit)
+                        matches, _, match_count = self.trie.find_top_k_matches(pattern, k, with_total=True)
                         if matches:
                             print("Matching keywords:")
                             for word, freq in matches:
                                 print(f"  {word} (freq: {freq})")
+                            if match_count > len(matches):
+                                print(f"  ... {match_count - len(matches)} more (use '${pattern} all' to list every match)")
                         else:
                             print("No matches found.")
                     else:
@@ -191,12 +209,12 @@ class NewspaperRestorationApp:
                 elif command.startswith('?'):
                     pattern = command[1:].strip().lower() if len(command) > 1 else None
                     if not pattern:
-                        pattern = input("Enter pattern with wildcards (*): ").strip().lower()
+                        pattern = input("Enter pattern with wildcards (* one char, [ce] class, % any run): ").strip().lower()
 
                     if pattern:
-                        matches = self.trie.find_all_matches_with_freq(pattern)
-                        if matches:
-                            best_word, best_freq = matches[0]
+                        best = self.trie.find_best_match(pattern)
+                        if best:
+                            best_word, best_freq = best
                             print(f"Best match: {best_word} (freq: {best_freq})")
                         else:
                             print("No match found.")
@@ -227,6 +245,9 @@ class NewspaperRestorationApp:
                     else:
                         print("File not found or invalid filename.")
                         
+                elif command.startswith('^'):
+                    self.query_stats_command(command[1:].strip().lower())
+
                 elif command == '!':
                     self.predict_restore_text_menu()
                     
@@ -243,6 +264,65 @@ class NewspaperRestorationApp:
             except Exception as e:
                 print(f"Error: {e}")
                 
+    def complete_command(self, args):
+        # '$' in the Construct/Edit menu: '$sun' or '$sun 20' lists the most frequent completions
+        args = args.split()
+        prefix = args[0] if args else ""
+        limit = args[1] if len(args) > 1 else str(self.max_candidates)
+        if not prefix or not limit.isdigit():
+            print("Invalid prefix. Use '$prefix' or '$prefix k'.")
+            return
+        # The per-node completion lists are built on the first completion and
+        # kept up to date by later edits (a no-op once enabled)
+        self.trie.enable_completions()
+        completions = self.trie.complete(prefix, int(limit))
+        if completions:
+            print(f"Completions for '{prefix}':")
+            for word, freq in completions:
+                print(f"  {word} (freq: {freq})")
+        else:
+            print(f"No keywords start with '{prefix}'.")
+
+    def memory_report_command(self):
+        # '&' in the Construct/Edit menu: node counts, histograms and estimated memory use
+        report = self.trie.memory_report()
+        print(f"\nNodes: {report['nodes']:,}   Words: {report['terminals']:,}")
+        print("\nEstimated memory:")
+        for component, size in report['bytes'].items():
+            print(f"  {component:<16}{size / 2**20:>10.2f} MB")
+        print("\nNodes per depth:")
+        for depth, count in report['nodes_by_depth'].items():
+            print(f"  {depth:>5} {count:>12,}")
+        print("\nNodes per number of children:")
+        for children, count in report['branching'].items():
+            print(f"  {children:>5} {count:>12,}")
+
+    def query_stats_command(self, option):
+        # '^on' / '^off' toggle trie instrumentation, '^' shows the collected statistics
+        if option == 'on':
+            self.trie.enable_stats()
+            print("Query statistics enabled.")
+        elif option == 'off':
+            self.trie.disable_stats()
+            print("Query statistics disabled.")
+        elif option:
+            print("Invalid option. Use '^on', '^off' or '^'.")
+        elif self.trie.query_stats is None:
+            print("Query statistics are off. Use '^on' to start recording.")
+        else:
+            stats = self.trie.stats()
+            if not stats:
+                print("No queries recorded yet.")
+                return
+            print(f"{'query':<6}{'calls':>8}{'cached':>8}{'visited':>12}{'pruned':>10}{'matches':>10}{'avg us':>10}")
+            for query, counters in sorted(stats.items()):
+                print(f"{query:<6}{counters['calls']:>8}{counters['cache_hits']:>8}"
+                      f"{counters['nodes_visited']:>12}{counters['branches_pruned']:>10}"
+                      f"{counters['matches']:>10}{counters['avg_time_us']:>10.1f}")
+            print("\nSlowest patterns:")
+            for elapsed, query, pattern, visited in self.trie.slowest_patterns(10):
+                print(f"  {elapsed * 1e3:8.3f} ms  {query:<5} {pattern}  ({visited} nodes)")
+
     def run(self):
         while True:
             try:
@@ -257,7 +337,7 @@ class NewspaperRestorationApp:
                     self.conf_restorer.trie = self.trie
                     self.conf_restorer.restore_confidence_menu()
                 elif choice == '4':
-                    self.conf_restorer.trie = self.trie
+                    self.freq_editor.trie = self.trie
                     self.freq_editor.manual_freq_menu()
                 elif choice == '5':
                     print("Additional Feature 3 - Context Analyzer")
@@ -0,0 +1,280 @@
+# radix_trie.py
+# Path-compressed (radix / Patricia) variant of the prefix trie
+# Shu Zhi and Ashley
+# DAAA/2A/03
+
+from trie import CharClass, compile_pattern, parse_keyword_blocks
+
+class RadixNode:
+    """
+    Node of a radix trie. The edge into the node is labelled with a whole
+    string instead of a single character, so chains of single-child nodes
+    collapse into one node. Words are not stored on the nodes; they are
+    rebuilt from the edge labels during traversal.
+    """
+    __slots__ = ("label", "children", "is_terminal", "frequency")
+
+    def __init__(self, label=""):
+        self.label = label  # Characters on the edge from the parent to this node
+        self.children = {}  # First character of a child's label -> child node
+        self.is_terminal = False
+        self.frequency = 0
+
+    def __str__(self):
+        return f"RadixNode(label='{self.label}', terminal={self.is_terminal}, freq={self.frequency})"
+
+def _common_prefix_length(a, b):
+    length = min(len(a), len(b))
+    i = 0
+    while i < length and a[i] == b[i]:
+        i += 1
+    return i
+
+def _label_matches(tokens, start, label):
+    # True if tokens[start:start + len(label)] match label, '*' matching any character
+    # and a CharClass any character it contains
+    for offset, char in enumerate(label):
+        token = tokens[start + offset]
+        if token == '*' or token == char:
+            continue
+        if not isinstance(token, CharClass) or not token.contains(char):
+            return False
+    return True
+
+class RadixTrie:
+    """
+    Radix (path-compressed) trie with the same API as PrefixTrie for adding,
+    deleting, searching, wildcard matching and file I/O. Every node has either
+    a word ending at it or at least two children, so the node count is at most
+    about twice the number of words, instead of one node per character.
+    Wildcards (*) and character classes ([ce]) are matched character by
+    character inside edge labels.
+    """
+    def __init__(self):
+        self.root = RadixNode()
+        self.size = 0  # Number of words in the trie
+
+    def add_keyword(self, word, frequency=1):
+        """
+        Add a word to the trie with given frequency.
+        If word already exists, increment its frequency.
+        Time Complexity: O(m) where m is the length of the word
+        """
+        if not word:
+            return
+        word = word.lower().strip()
+        node = self.root
+        i = 0
+        while i < len(word):
+            child = node.children.get(word[i])
+            if child is None:
+                # No edge starts with this character: hang the rest of the word here
+                child = node.children[word[i]] = RadixNode(word[i:])
+                node = child
+                i = len(word)
+                break
+            common = _common_prefix_length(child.label, word[i:])
+            if common < len(child.label):
+                # The word leaves the edge part-way: split it at the divergence point
+                middle = RadixNode(child.label[:common])
+                child.label = child.label[common:]
+                middle.children[child.label[0]] = child
+                node.children[word[i]] = middle
+                child = middle
+            node = child
+            i += common
+
+        if not node.is_terminal:
+            self.size += 1
+            node.is_terminal = True
+            node.frequency = frequency
+        else:
+            node.frequency += frequency
+
+    def _find_node(self, word):
+        # Returns (path of (parent, node) pairs, node) for an exact word, or (path, None)
+        node = self.root
+        path = []
+        i = 0
+        while i < len(word):
+            child = node.children.get(word[i])
+            if child is None or not word.startswith(child.label, i):
+                return path, None
+            path.append((node, child))
+            node = child
+            i += len(child.label)
+        return path, node
+
+    def search_keyword(self, word):
+        """
+        Search for a word in the trie.
+        Returns True if word exists, False otherwise.
+        Time Complexity: O(m) where m is the length of the word
+        """
+        if not word:
+            return False
+        _, node = self._find_node(word.lower().strip())
+        return node is not None and node.is_terminal
+
+    def delete_keyword(self, word):
+        """
+        Delete a word from the trie, merging nodes that are left with a single
+        child so the trie stays fully compressed.
+        Returns True if word was deleted, False if word doesn't exist.
+        Time Complexity: O(m) where m is the length of the word
+        """
+        if not word:
+            return False
+        path, node = self._find_node(word.lower().strip())
+        if node is None or not node.is_terminal or node is self.root:
+            return False
+
+        node.is_terminal = False
+        node.frequency = 0
+        self.size -= 1
+
+        parent = path[-1][0]
+        if not node.children:
+            del parent.children[node.label[0]]
+            # The parent may now be a non-word node with a single child
+            if parent is not self.root and not parent.is_terminal and len(parent.children) == 1:
+                grandparent = path[-2][0]
+                self._merge_with_child(grandparent, parent)
+        elif len(node.children) == 1:
+            self._merge_with_child(parent, node)
+        return True
+
+    def _merge_with_child(self, parent, node):
+        # Replace node (non-terminal, one child) by its child with the labels joined
+        (child,) = node.children.values()
+        child.label = node.label + child.label
+        parent.children[child.label[0]] = child
+
+    def find_all_matches_with_freq(self, pattern):
+        """
+        Find all words matching a pattern with wildcards (*), character classes
+        ([ce]) and gaps (%), see trie.compile_pattern.
+        Returns a list of (word, frequency) sorted by frequency (descending),
+        then alphabetically.
+        Time Complexity: O(n) where n is the number of characters on the edges visited
+        """
+        results = list(self.iter_matches(pattern))
+        results.sort(key=lambda x: (-x[1], x[0]))
+        return results
+
+    def iter_matches(self, pattern):
+        """
+        Lazily yield (word, frequency) for each word matching a pattern with
+        wildcards (*) and character classes ([ce]), in trie order. An edge is
+        followed only if its whole label fits in the rest of the pattern and
+        matches it character by character. Patterns with gaps (%) match words
+        of any length, so every word is tested against them.
+        """
+        pattern = compile_pattern(pattern)
+        if pattern.has_gap:
+            yield from ((word, freq) for word, freq in self._iter_words() if pattern.matches(word))
+            return
+        tokens = pattern.tokens
+        length = len(tokens)
+        stack = [(self.root, 0, "")]
+        while stack:
+            node, i, path = stack.pop()
+            if i == length:
+                if node.is_terminal:
+                    yield path, node.frequency
+                continue
+            token = tokens[i]
+            if isinstance(token, str) and token != '*':
+                child = node.children.get(token)
+                candidates = (child,) if child is not None else ()
+            else:
+                candidates = node.children.values()
+            for child in candidates:
+                end = i + len(child.label)
+                if end <= length and _label_matches(tokens, i, child.label):
+                    stack.append((child, end, path + child.label))
+
+    def find_best_match(self, pattern):
+        """
+        Find the (word, frequency) with the highest frequency matching a pattern
+        (see find_all_matches_with_freq), ties broken alphabetically, or None if no match.
+        Time Complexity: O(n) where n is the number of characters on the edges visited
+        """
+        best = None
+        for word, freq in self.iter_matches(pattern):
+            if best is None or freq > best[1] or (freq == best[1] and word < best[0]):
+                best = (word, freq)
+        return best
+
+    def get_all_words(self):
+        """
+        Get all words in the trie with their frequencies.
+        Returns a list of tuples (word, frequency) sorted by frequency (descending)
+        then alphabetically.
+        Time Complexity: O(n) where n is the number of nodes in the trie
+        """
+        words = list(self._iter_words())
+        words.sort(key=lambda x: (-x[1], x[0]))
+        return words
+
+    def _iter_words(self):
+        # Yields (word, frequency) for every word, in trie order
+        stack = [(self.root, "")]
+        while stack:
+            node, path = stack.pop()
+            if node.is_terminal:
+                yield path, node.frequency
+            for child in node.children.values():
+                stack.append((child, path + child.label))
+
+    def node_count(self):
+        """Return the number of nodes in the trie, including the root."""
+        count = 0
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(node.children.values())
+        return count
+
+    def read_keywords_from_file(self, filename):
+        """
+        Read keywords from a file and build the trie.
+        File format: word,frequency (one per line)
+        Clears existing trie before loading new data. Malformed lines are skipped and reported.
+        """
+        try:
+            self.root = RadixNode()
+            self.size = 0
+            malformed = []
+            with open(filename, 'r', encoding='utf-8') as file:
+                for word, frequency in parse_keyword_blocks(file, malformed):
+                    self.add_keyword(word, frequency)
+            if malformed:
+                print(f"Warning: skipped {len(malformed)} malformed line(s) in '{filename}'.")
+
+        except FileNotFoundError:
+            print(f"Error: File '{filename}' not found.")
+        except Exception as e:
+            print(f"Error reading file: {e}")
+
+    def write_keywords_to_file(self, filename):
+        """
+        Write all keywords and their frequencies to a file.
+        File format: word,frequency (one per line)
+        """
+        try:
+            with open(filename, 'w', encoding='utf-8') as file:
+                for word, frequency in self.get_all_words():
+                    file.write(f"{word},{frequency}\n")
+
+        except Exception as e:
+            print(f"Error writing file: {e}")
+
+    def __len__(self):
+        """Return the number of words in the trie."""
+        return self.size
+
+    def __str__(self):
+        """String representation of the trie."""
+        return f"RadixTrie(size={self.size})"
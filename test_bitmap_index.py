@@ -0,0 +1,40 @@
+# test_bitmap_index.py
+# Randomized checks of BitmapIndex against brute force over a plain dictionary
+# Shu Zhi and Ashley
+# DAAA/2A/03
+
+import random
+
+import pytest
+
+pytest.importorskip("numpy")  # BitmapIndex is an optional engine
+
+from bitmap_index import BitmapIndex
+from test_trie import brute_matches, build, random_pattern, random_word, ranked
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_bitmap_index_matches_brute_force(seed):
+    rng = random.Random(seed)
+    trie, words = build(rng)
+    index = BitmapIndex.from_trie(trie)
+    patterns = ["*", "****", "[^a]**"] + [random_pattern(rng) for _ in range(40)]
+    for _ in range(4):
+        assert index.get_all_words() == ranked(words.items())
+        for word in [random_word(rng) for _ in range(30)]:
+            assert index.search_keyword(word) == (word in words)
+            assert index.get_frequency(word) == words.get(word)
+        for pattern in patterns:
+            expected = brute_matches(words, pattern)
+            assert index.find_all_matches_with_freq(pattern) == expected, pattern
+            assert index.find_best_match(pattern) == (expected[0] if expected else None), pattern
+            for k in (1, 3, 100):
+                assert index.find_top_k_matches(pattern, k) == expected[:k], (pattern, k)
+        for _ in range(100):  # Edits make the bitmaps stale until the next query
+            word = random_word(rng)
+            if rng.random() < 0.4:
+                assert index.delete_keyword(word) == (word in words)
+                words.pop(word, None)
+            else:
+                frequency = rng.randint(1, 30)
+                index.add_keyword(word, frequency)
+                words[word] = words.get(word, 0) + frequency
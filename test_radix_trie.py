@@ -0,0 +1,45 @@
+# test_radix_trie.py
+# Randomized checks of RadixTrie against brute force over a plain dictionary
+# Shu Zhi and Ashley
+# DAAA/2A/03
+
+import random
+
+import pytest
+
+from radix_trie import RadixTrie
+from test_trie import brute_matches, random_pattern, random_word, ranked
+
+def check_compressed(trie):
+    # Below the root, every node holds a word or branches
+    stack = list(trie.root.children.values())
+    while stack:
+        node = stack.pop()
+        assert node.label and (node.is_terminal or len(node.children) >= 2), node
+        stack.extend(node.children.values())
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_radix_trie_matches_brute_force(seed):
+    rng = random.Random(seed)
+    trie, words = RadixTrie(), {}
+    patterns = [random_pattern(rng) for _ in range(40)]
+    for _ in range(5):
+        for _ in range(300):
+            word = random_word(rng, 8)
+            if rng.random() < 0.35:
+                assert trie.delete_keyword(word) == (word in words)  # Merges single-child nodes
+                words.pop(word, None)
+            else:
+                frequency = rng.randint(1, 30)
+                trie.add_keyword(word, frequency)  # Splits edges in the middle of a label
+                words[word] = words.get(word, 0) + frequency
+        check_compressed(trie)
+        assert len(trie) == len(words)
+        assert trie.node_count() <= 2 * len(words) + 1
+        assert trie.get_all_words() == ranked(words.items())
+        for word in [random_word(rng, 8) for _ in range(50)]:
+            assert trie.search_keyword(word) == (word in words)
+        for pattern in patterns:
+            expected = brute_matches(words, pattern)
+            assert trie.find_all_matches_with_freq(pattern) == expected, pattern
+            assert trie.find_best_match(pattern) == (expected[0] if expected else None), pattern
@@ -0,0 +1,49 @@
+# test_text_processor.py
+# Checks that parallel restoration is byte-identical to the sequential pipeline
+# Shu Zhi and Ashley
+# DAAA/2A/03
+
+import random
+
+import pytest
+
+from test_trie import build, random_pattern, random_word
+from text_processor import TextProcessor, iter_restored_lines, iter_restored_lines_parallel
+
+def random_text(rng, lines=300):
+    # Plain words, misspellings, wildcard words in mixed case and extended patterns
+    text = []
+    for _ in range(lines):
+        words = []
+        for _ in range(rng.randint(0, 8)):
+            choice = rng.random()
+            word = random_pattern(rng) if choice < 0.5 else random_word(rng, 8)
+            words.append(word.upper() if rng.random() < 0.2 else word)
+        text.append(" ".join(words))
+    return text
+
+@pytest.mark.parametrize("mode", ["best", "all", "fuzzy"])
+@pytest.mark.parametrize("extended", [False, True])
+def test_parallel_chunks_match_sequential(mode, extended):
+    rng = random.Random(43)
+    trie, _ = build(rng)
+    text = random_text(rng)
+    expected = list(iter_restored_lines(text, trie.snapshot(), mode, extended))
+    parallel = iter_restored_lines_parallel(text, trie.snapshot(), mode, workers=2, chunk_lines=7,
+                                            extended=extended)
+    assert list(parallel) == expected
+
+def test_parallel_file_is_byte_identical(tmp_path):
+    rng = random.Random(47)
+    trie, _ = build(rng)
+    trie.enable_answer_table(3, 1)  # Rebuilt by every worker
+    # More lines than CHUNK_LINES, so the file is split across workers
+    source = tmp_path / "input.txt"
+    source.write_text("\n".join(random_text(rng, 2200)) + "\n", encoding="utf-8")
+    processor = TextProcessor(extended_patterns=True)
+    for mode, restore in (("best", processor.restore_text_best_matches),
+                          ("all", processor.restore_text_all_matches),
+                          ("fuzzy", processor.restore_text_fuzzy_matches)):
+        restore(source, tmp_path / "sequential.txt", trie)
+        processor.restore_text_parallel(source, tmp_path / "parallel.txt", trie, mode, workers=2)
+        assert (tmp_path / "parallel.txt").read_bytes() == (tmp_path / "sequential.txt").read_bytes(), mode
@@ -0,0 +1,284 @@
+# test_trie.py
+# Randomized checks of PrefixTrie queries against brute force over a plain dictionary
+# Shu Zhi and Ashley
+# DAAA/2A/03
+
+import itertools
+import random
+import re
+
+import pytest
+
+import trie as trie_module
+from trie import PrefixTrie, compile_pattern
+
+ALPHABET = "abcd"  # Small alphabet so that patterns have many matches
+
+def random_word(rng, longest=6):
+    return "".join(rng.choices(ALPHABET, k=rng.randint(1, longest)))
+
+def random_pattern(rng):
+    # Letters, '*' wildcards, classes and gaps
+    tokens = ["a", "b", "c", "d", "*", "*", "[ab]", "[^c]", "%"]
+    return "".join(rng.choice(tokens) for _ in range(rng.randint(1, 5)))
+
+def ranked(pairs):
+    return sorted(pairs, key=lambda x: (-x[1], x[0]))
+
+def brute_matches(words, pattern):
+    regex = pattern.replace("*", ".")
+    regex = re.compile(re.sub(r"%(\{[0-9,]*\})?", lambda gap: "." + (gap.group(1) or "*"), regex))
+    return ranked((word, freq) for word, freq in words.items() if regex.fullmatch(word))
+
+def brute_completions(words, prefix, k):
+    matches = ranked((word, freq) for word, freq in words.items() if word.startswith(prefix))
+    return matches if k is None else matches[:k]
+
+def random_edits(trie, words, rng, count):
+    # Applies count random adds, deletes, frequency sets and bulk updates to both
+    for _ in range(count):
+        word = random_word(rng)
+        choice = rng.random()
+        if choice < 0.3 and word in words:
+            trie.delete_keyword(word)
+            del words[word]
+        elif choice < 0.5 and word in words:
+            frequency = rng.randint(0, 30)
+            trie.set_frequency(word, frequency)
+            words[word] = frequency
+        elif choice < 0.55 and words:
+            updates = [(word, rng.randint(0, 30), False) for word in rng.sample(sorted(words), 20)]
+            trie.update_frequencies(updates)
+            words.update((word, frequency) for word, frequency, _ in updates)
+        elif choice < 0.6:
+            pairs = [(random_word(rng), rng.randint(1, 5)) for _ in range(20)]
+            trie.bulk_insert(pairs)
+            for new_word, frequency in pairs:
+                words[new_word] = words.get(new_word, 0) + frequency
+        else:
+            frequency = rng.randint(1, 30)
+            trie.add_keyword(word, frequency)
+            words[word] = words.get(word, 0) + frequency
+
+def check_queries(trie, words, patterns):
+    for pattern in patterns:
+        expected = brute_matches(words, pattern)
+        assert trie.find_all_matches_with_freq(pattern) == expected, pattern
+        assert trie.find_best_match(pattern) == (expected[0] if expected else None), pattern
+        assert trie.find_top_k_matches(pattern, 3) == expected[:3], pattern
+
+def check_completions(trie, words, rng):
+    prefixes = ["", "a", "ab"] + [random_word(rng, 4) for _ in range(20)]
+    for prefix in prefixes:
+        for k in (1, 5, 10, 25, None):
+            assert trie.complete(prefix, k) == brute_completions(words, prefix, k), (prefix, k)
+
+def build(rng, size=800):
+    words = {}
+    for _ in range(size):
+        word = random_word(rng)
+        words[word] = words.get(word, 0) + rng.randint(1, 20)
+    return PrefixTrie.from_pairs(words.items()), words
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_cached_queries_follow_edits(seed):
+    rng = random.Random(seed)
+    trie, words = build(rng)
+    patterns = [random_pattern(rng) for _ in range(40)]
+    for _ in range(5):
+        check_queries(trie, words, patterns)
+        check_queries(trie, words, patterns)  # Served from the cache
+        random_edits(trie, words, rng, 150)  # Must invalidate the patterns that match an edited word
+    check_queries(trie, words, patterns)
+    assert trie.cache_info()["hits"] > 0
+
+@pytest.mark.parametrize("completion_lists", [False, True])
+def test_complete_matches_brute_force(completion_lists):
+    rng = random.Random(7)
+    trie, words = build(rng)
+    if completion_lists:
+        trie.enable_completions()
+    for _ in range(5):
+        check_completions(trie, words, rng)
+        random_edits(trie, words, rng, 150)
+    check_completions(trie, words, rng)
+    trie.disable_completions()
+    check_completions(trie, words, rng)
+
+def test_snapshots_are_isolated_from_later_edits():
+    rng = random.Random(11)
+    trie, words = build(rng)
+    patterns = [random_pattern(rng) for _ in range(40)]
+    trie.enable_completions()
+    versions = []
+    for _ in range(4):
+        versions.append((trie.snapshot(), dict(words)))
+        random_edits(trie, words, rng, 150)
+    for snapshot, snapshot_words in versions:
+        assert snapshot.get_all_words() == ranked(snapshot_words.items())
+        check_queries(snapshot, snapshot_words, patterns)
+        check_completions(snapshot, snapshot_words, rng)
+        with pytest.raises(TypeError):
+            snapshot.add_keyword("abc")
+    check_queries(trie, words, patterns)
+    check_completions(trie, words, rng)
+
+def test_node_aggregates_follow_edits():
+    # Incrementally maintained aggregates must equal a recomputation from the children
+    rng = random.Random(13)
+    trie, words = build(rng)
+    trie.enable_suffix_trie()
+    for _ in range(5):
+        random_edits(trie, words, rng, 300)
+        trie.snapshot()  # Later edits copy the shared nodes on their path
+        for root in (trie.root, trie.suffix_trie.root):
+            stack = [root]
+            while stack:
+                node = stack.pop()
+                bounds = (node.max_freq, node.min_depth, node.max_depth, node.term_count, node.freq_sum)
+                node.refresh_bounds()
+                node.refresh_totals()
+                assert bounds == (node.max_freq, node.min_depth, node.max_depth,
+                                  node.term_count, node.freq_sum)
+                stack.extend(node.children.values())
+
+def test_match_summary_matches_brute_force():
+    rng = random.Random(17)
+    trie, words = build(rng, 1500)
+    # Wildcard-only tails are answered from the per-length tables of shallow nodes
+    patterns = ["*", "**", "*****", "a***", "*b**", "[ab]****"]
+    patterns += [random_pattern(rng) for _ in range(30)]
+    for _ in range(4):
+        for pattern in patterns:
+            expected = brute_matches(words, pattern)
+            for k in (0, 1, 5):
+                total, count, top = trie.match_summary(pattern, k)
+                assert (total, count, top) == (sum(freq for _, freq in expected), len(expected),
+                                               expected[:k]), (pattern, k)
+        trie.snapshot()
+        random_edits(trie, words, rng, 300)  # Deletes and decreases leave some maxima as upper bounds
+
+def test_gap_pattern_top_k_matches_brute_force():
+    rng = random.Random(19)
+    trie, words = build(rng, 1500)
+    patterns = ["%", "a%", "%a", "%a%b%", "*%{1,2}c", "%{2,}d%", "[ab]%[cd]"]
+    for _ in range(3):
+        for pattern in patterns:
+            expected = brute_matches(words, pattern)
+            assert trie.find_best_match(pattern) == (expected[0] if expected else None), pattern
+            for k in (1, 4, 50):
+                assert trie.find_top_k_matches(pattern, k) == expected[:k], (pattern, k)
+        random_edits(trie, words, rng, 300)
+
+def test_character_classes_with_non_ascii_words():
+    rng = random.Random(23)
+    letters = "abé√ü-'"
+    words = {}
+    for _ in range(600):
+        word = "".join(rng.choices(letters, k=rng.randint(1, 4)))
+        words[word] = words.get(word, 0) + rng.randint(1, 20)
+    trie = PrefixTrie.from_pairs(words.items())
+    patterns = ["[é]*", "*[^é]", "[aé√]%", "%[^a-b]", "[-']*", "[^ü']**", "*[ü]*"]
+    for _ in range(3):
+        check_queries(trie, words, patterns)
+        for word in rng.sample(sorted(words), 100):
+            trie.delete_keyword(word)  # Clears the shared non-ASCII bit once no such child is left
+            del words[word]
+
+def test_update_frequencies_counts_each_word_once():
+    trie = PrefixTrie.from_pairs([("cat", 5), ("car", 3), ("dog", 2)])
+    updates = [("cat", 1, True), ("cat", 1, True), ("car", 7, False), ("car", 3, False),
+               ("dog", -3, True), ("cow", 4, False)]
+    # cat changes twice, car ends where it started, dog would go negative, cow is unknown
+    assert trie.update_frequencies(updates) == (1, ["cow"], [("dog", -3, True)])
+    assert trie.get_all_words() == [("cat", 7), ("car", 3), ("dog", 2)]
+    assert trie.find_best_match("ca*") == ("cat", 7)
+
+def test_suffix_trie_planner_matches_brute_force():
+    rng = random.Random(29)
+    trie, words = build(rng)
+    trie.enable_suffix_trie()
+    # Fixed characters at the end make the planner walk the reversed-word trie
+    patterns = ["*b", "**ab", "*[ab]cd", "[^a]*dc", "a*bc"]
+    patterns += ["*" * rng.randint(1, 3) + random_word(rng, 3) for _ in range(30)]
+    assert trie._plan(compile_pattern("**ab"))[0] is trie.suffix_trie
+    for _ in range(4):
+        check_queries(trie, words, patterns)
+        for pattern in patterns[:10]:
+            expected = brute_matches(words, pattern)
+            assert trie.match_summary(pattern, 2) == (sum(freq for _, freq in expected),
+                                                      len(expected), expected[:2]), pattern
+        random_edits(trie, words, rng, 200)  # Mirrored into the suffix trie
+
+def test_answer_table_matches_brute_force():
+    rng = random.Random(31)
+    trie, words = build(rng)
+    trie.enable_answer_table(max_length=3, k=2)
+    # Every pattern with a '*' of up to three characters is in the table (or has no match)
+    patterns = ["".join(chars) for length in (1, 2, 3)
+                for chars in itertools.product(ALPHABET + "*", repeat=length) if "*" in chars]
+    for _ in range(3):
+        snapshot, snapshot_words = trie.snapshot(), dict(words)
+        random_edits(trie, words, rng, 200)  # Refreshes the patterns of the edited short words
+        for table_trie, table_words in ((trie, words), (snapshot, snapshot_words)):
+            assert table_trie.match_many(patterns, 2) == {
+                pattern: brute_matches(table_words, pattern)[:2] for pattern in patterns}
+            for pattern in rng.sample(patterns, 40):
+                expected = brute_matches(table_words, pattern)
+                assert table_trie.find_best_match(pattern) == (expected[0] if expected else None)
+                assert table_trie.find_top_k_matches(pattern, 2) == expected[:2], pattern
+
+@pytest.mark.parametrize("block_size", [7, 1 << 20])
+def test_bulk_load_matches_line_by_line_parsing(block_size, tmp_path, monkeypatch):
+    monkeypatch.setattr(trie_module, "READ_BLOCK_SIZE", block_size)  # Lines split across blocks
+    rng = random.Random(37)
+    lines, words, malformed = [], {}, []
+    for line_number in range(1, 1200):
+        word = random_word(rng)
+        frequency = rng.randint(0, 50)
+        kind = rng.random()
+        if kind < 0.05:
+            lines.append(f"{word},x{frequency}")
+            malformed.append((line_number, lines[-1]))
+            continue
+        if kind < 0.1:
+            lines.append(f" {word.upper()} ")  # No comma: frequency 1
+            frequency = 1
+        elif kind < 0.13:
+            lines.append("")
+            continue
+        else:
+            lines.append(f"{word},{frequency}\r" if kind < 0.2 else f"{word},{frequency}")
+        words[word] = words.get(word, 0) + frequency
+    filename = tmp_path / "keywords.txt"
+    filename.write_bytes("\n".join(lines).encode("utf-8"))
+
+    trie = PrefixTrie()
+    trie.add_keyword("stale", 5)  # Replaced by the file's contents
+    assert trie.bulk_load(filename) == malformed
+    assert trie.get_all_words() == ranked(words.items())
+    check_queries(trie, words, [random_pattern(rng) for _ in range(30)])
+
+def levenshtein(word, other):
+    # Edit distance where '*' in word matches any one character at no cost
+    row = list(range(len(other) + 1))
+    for i, char in enumerate(word, 1):
+        previous, row[0] = row[0], i
+        for j, other_char in enumerate(other, 1):
+            cost = 0 if char in ('*', other_char) else 1
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + cost)
+    return row[-1]
+
+def test_find_within_distance_matches_brute_force():
+    rng = random.Random(41)
+    trie, words = build(rng)
+    queries = [random_word(rng) for _ in range(30)] + ["a*c", "*", "dddddddd"]
+    for _ in range(3):
+        for query in queries:
+            for max_edits in (0, 1, 2):
+                expected = sorted(((word, freq, levenshtein(query, word)) for word, freq in words.items()),
+                                  key=lambda x: (x[2], -x[1], x[0]))
+                expected = [entry for entry in expected if entry[2] <= max_edits]
+                assert trie.find_within_distance(query, max_edits, None) == expected, (query, max_edits)
+                assert trie.find_within_distance(query, max_edits, 5) == expected[:5], (query, max_edits)
+        random_edits(trie, words, rng, 200)
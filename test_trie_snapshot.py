@@ -0,0 +1,53 @@
+# test_trie_snapshot.py
+# Randomized checks of the read-only MappedTrie and FrozenTrie against brute force
+# Shu Zhi and Ashley
+# DAAA/2A/03
+
+import random
+
+import pytest
+
+from test_trie import brute_completions, brute_matches, build, random_pattern, ranked
+from trie import PrefixTrie
+
+def check_read_only_queries(trie, words, rng):
+    patterns = ["*", "a%", "%b", "[ab]**"] + [random_pattern(rng) for _ in range(40)]
+    assert trie.get_all_words() == ranked(words.items())
+    for word in rng.sample(sorted(words), 50) + ["zz", "abcdabcd"]:
+        assert trie.search_keyword(word) == (word in words)
+        assert trie.get_frequency(word) == words.get(word)
+    for pattern in patterns:
+        expected = brute_matches(words, pattern)
+        total = sum(freq for _, freq in expected)
+        assert trie.find_all_matches_with_freq(pattern) == expected, pattern
+        assert trie.find_best_match(pattern) == (expected[0] if expected else None), pattern
+        for k in (1, 3, 20):
+            assert trie.find_top_k_matches(pattern, k) == expected[:k], (pattern, k)
+        assert trie.find_top_k_matches(pattern, None, with_total=True) == (expected, total, len(expected))
+        assert trie.match_summary(pattern, 5) == (total, len(expected), expected[:5]), pattern
+    assert trie.match_many(patterns[:10], 2) == {p: brute_matches(words, p)[:2] for p in patterns[:10]}
+    for prefix in ["", "a", "bd", "dddd", "q"]:
+        for k in (1, 10, None):
+            assert trie.complete(prefix, k) == brute_completions(words, prefix, k), (prefix, k)
+    thawed = trie.thaw()
+    assert isinstance(thawed, PrefixTrie)
+    assert thawed.get_all_words() == ranked(words.items())
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_mapped_trie_matches_brute_force(seed, tmp_path):
+    rng = random.Random(seed)
+    trie, words = build(rng)
+    path = tmp_path / "keywords.snap"
+    trie.save_snapshot(path)
+    with PrefixTrie.load_snapshot(path) as mapped:
+        assert len(mapped) == len(words)
+        check_read_only_queries(mapped, words, rng)
+
+@pytest.mark.parametrize("seed", [3, 4])
+def test_frozen_trie_matches_brute_force(seed):
+    rng = random.Random(seed)
+    trie, words = build(rng)
+    frozen = trie.freeze()
+    trie.add_keyword("abcabc", 99)  # Later edits do not reach the frozen copy
+    assert len(frozen) == len(words)
+    check_read_only_queries(frozen, words, rng)
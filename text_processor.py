@@ -3,91 +3,288 @@
 # Shu Zhi and Ashley
 # DAAA/2A/03
 
+import os
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from bitmap_index import BitmapIndex
+from trie import GAP, CharClass, PrefixTrie, compile_pattern
+
+CHUNK_LINES = 2000  # Lines per task handed to a worker process in parallel mode
+FUZZY_MAX_EDITS = 1  # Edit budget when correcting unknown words in fuzzy mode
+FUZZY_MIN_LENGTH = 4  # Shorter unknown words are left alone (too many 1-edit neighbours)
+PATTERN_SYNTAX = re.compile(r'\[\^?.[^\]]*\]|%(\{[^}]*\})?')  # Classes and gaps, see is_pattern
+
+# Matching engines: name -> function turning the dictionary into the object that is queried
+ENGINES = {
+    'trie': lambda trie: trie,  # Walk the trie itself
+    'bitmap': BitmapIndex.from_trie,  # Positional bitmaps (needs NumPy), faster for long patterns
+}
 
 class TextProcessor:
-    def __init__(self):
-        pass
+    def __init__(self, workers=1, engine='trie', extended_patterns=False):
+        # workers > 1 restores files in a process pool (see restore_text_parallel)
+        self.workers = workers
+        # extended_patterns also restores words with classes ('[ce]at') and gaps ('Qu%k');
+        # off by default so text such as '50%' or '[1]' is left alone
+        self.extended_patterns = extended_patterns
+        # engine is a key of ENGINES; the bitmap engine is built from the trie once per file
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {sorted(ENGINES)}")
+        self.engine = engine
 
     def restore_text_all_matches(self, filename, output_filename, trie):
         """
         Reads a file with wildcard words, finds all possible matches in the trie.
         Prints the restored lines or saves them to a file.
+        Lines are streamed from input to output, so memory use does not grow
+        with the size of the file.
         """
-        try:
-            restored_lines = []
-            with open(filename, 'r', encoding='utf-8') as f:
-                for line in f:
-                    words = line.strip().split()
-                    restored_words = []
-                    for w in words:
-                        if '*' in w:
-                            matches = trie.find_all_matches_with_freq(w.lower())
-                            # Format matches while preserving original case
-                            matched_words = [match_case_pattern(w, m[0]) for m in matches]
-                            restored_words.append(str(matched_words))
-                        else:
-                            restored_words.append(w)
-                    restored_lines.append(' '.join(restored_words))
-
-            if output_filename:
-                with open(output_filename, 'w', encoding='utf-8') as outfile:
-                    for line in restored_lines:
-                        outfile.write(line + '\n')
-                print(f"\nRestored text successfully saved to '{output_filename}'.")
-            else:
-                print("\n--- Restored Text (All Matches) ---")
-                for line in restored_lines:
-                    print(line)
-                print("--- End of Text ---")
-
-        except FileNotFoundError:
-            print(f"Error: File '{filename}' not found.")
-        except Exception as e:
-            print(f"An error occurred: {e}")
+        self._restore_file(filename, output_filename, trie, 'all', "All Matches")
 
     def restore_text_best_matches(self, input_file, output_file, trie):
         """
         Reads a file with wildcard words, finds the best match for each in the trie.
         Prints the restored lines or saves them to a file.
+        Lines are streamed from input to output, so memory use does not grow
+        with the size of the file.
+        """
+        self._restore_file(input_file, output_file, trie, 'best', "Best Matches")
+
+    def restore_text_fuzzy_matches(self, input_file, output_file, trie):
+        """
+        Like restore_text_best_matches, but words without wildcards that are
+        not in the dictionary are also replaced by <closest word>, found with
+        PrefixTrie.find_within_distance (FUZZY_MAX_EDITS edits at most).
+        Fixes OCR misreads such as 'Udderslakc' -> '<Udderslake>'.
+        """
+        self._restore_file(input_file, output_file, trie, 'fuzzy', "Fuzzy Matches")
+
+    def restore_text_parallel(self, input_file, output_file, trie, mode='best', workers=None):
+        """
+        Restore a file using a pool of worker processes.
+        The input is split on line boundaries into chunks that are restored in
+        parallel, and the output is written in the original order. It is
+        byte-identical to restore_text_best_matches ('best'),
+        restore_text_all_matches ('all') or restore_text_fuzzy_matches
+        ('fuzzy'). workers defaults to self.workers, or the number of CPUs if
+        that is 1.
         """
+        workers = workers or (self.workers if self.workers > 1 else os.cpu_count() or 1)
+        title = {'best': "Best Matches", 'all': "All Matches", 'fuzzy': "Fuzzy Matches"}.get(mode, mode)
+        self._restore_file(input_file, output_file, trie, mode, title, workers)
+
+    def _restore_file(self, input_file, output_file, trie, mode, title, workers=None):
+        """
+        Run the read -> tokenize -> restore -> write pipeline for one file.
+        Only one line (or, in parallel mode, a bounded number of chunks) is held
+        in memory at a time. A PrefixTrie is read through a snapshot, so edits
+        made on other threads while the file is restored do not affect it.
+        """
+        workers = workers or self.workers
         try:
-            restored_lines = []
+            if hasattr(trie, 'snapshot'):
+                trie = trie.snapshot()
+            trie = ENGINES[self.engine](trie)
             with open(input_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    words = line.strip().split()
-                    restored_words = []
-                    for w in words:
-                        if '*' in w:
-                            best_match = trie.find_best_match(w.lower())
-                            if best_match:
-                                # Format the best match and preserve case
-                                restored_word = f"<{match_case_pattern(w, best_match[0])}>"
-                                restored_words.append(restored_word)
-                            else:
-                                restored_words.append(w)  # No match found
-                        else:
-                            restored_words.append(w)
-                    restored_lines.append(' '.join(restored_words))
-
-            if output_file:
-                with open(output_file, 'w', encoding='utf-8') as outfile:
+                if workers > 1:
+                    restored_lines = iter_restored_lines_parallel(f, trie, mode, workers,
+                                                                  extended=self.extended_patterns)
+                else:
+                    restored_lines = iter_restored_lines(f, trie, mode, self.extended_patterns)
+                if output_file:
+                    with open(output_file, 'w', encoding='utf-8') as outfile:
+                        write_lines(restored_lines, outfile)
+                    print(f"\nRestored text successfully saved to '{output_file}'.")
+                else:
+                    print(f"\n--- Restored Text ({title}) ---")
                     for line in restored_lines:
-                        outfile.write(line + '\n')
-                print(f"\nRestored text successfully saved to '{output_file}'.")
-            else:
-                print("\n--- Restored Text (Best Matches) ---")
-                for line in restored_lines:
-                    print(line)
-                print("--- End of Text ---")
-                
+                        print(line)
+                    print("--- End of Text ---")
+
         except FileNotFoundError:
             print(f"Error: File '{input_file}' not found.")
         except Exception as e:
             print(f"An error occurred: {e}")
 
+def format_all_matches(word, matches):
+    # Replaces a wildcard word with the list of all its matches (original case kept)
+    return str([match_case_pattern(word, m[0]) for m in matches])
+
+def format_best_match(word, matches):
+    # Replaces a wildcard word with <best match>, or leaves it as is if nothing matches
+    if matches:
+        return f"<{match_case_pattern(word, matches[0][0])}>"
+    return word
+
+# mode -> (number of matches needed per word, or None for all; formatter)
+RESTORE_MODES = {
+    'all': (None, format_all_matches),
+    'best': (1, format_best_match),
+    'fuzzy': (1, format_best_match),  # 'best', plus correction of unknown words
+}
+
+def match_patterns(patterns, trie, k=None):
+    """
+    Return {pattern: [(word, frequency), ...]} for a batch of lowercase patterns.
+    Uses the trie's single-traversal match_many when it has one, and falls back
+    to one query per pattern for other dictionaries (e.g. a RadixTrie or BitmapIndex).
+    """
+    if hasattr(trie, 'match_many'):
+        return trie.match_many(patterns, k)
+    results = {}
+    for pattern in patterns:
+        if k == 1:
+            best = trie.find_best_match(pattern)
+            results[pattern] = [best] if best else []
+        else:
+            results[pattern] = trie.find_all_matches_with_freq(pattern)[:k]
+    return results
+
+def needs_correction(word, trie):
+    # Fuzzy mode: a plain word long enough to correct that the dictionary does not know
+    return len(word) >= FUZZY_MIN_LENGTH and word.isalpha() and not trie.search_keyword(word)
+
+def correct_word(word, trie, k=1):
+    """
+    Return up to k (word, frequency) candidates within FUZZY_MAX_EDITS edits of
+    a lowercase word, closest first. Dictionaries without find_within_distance
+    (e.g. a BitmapIndex) give no candidates, so the word is left unchanged.
+    """
+    if not hasattr(trie, 'find_within_distance'):
+        return []
+    return [(match, freq) for match, freq, _ in trie.find_within_distance(word, FUZZY_MAX_EDITS, k)]
+
+def is_pattern(word, extended=False):
+    # A word to restore: it has a wildcard (*) or, with extended syntax, a class ([ce])
+    # or gap (%), and parses as a pattern. Classes and gaps with no letter or '*'
+    # beside them ('%', '50%', '[ce]') and one-character classes ('[x]', '[1]') are text.
+    if not extended:
+        return '*' in word and '[' not in word and GAP not in word
+    if '*' not in word and '[' not in word and GAP not in word:
+        return False
+    try:
+        pattern = compile_pattern(word.lower())
+    except ValueError:
+        return False  # e.g. '%{x}' or '[ce' is left as text
+    if any(isinstance(token, CharClass) and not token.negated and len(token.chars) < 2
+           for token in pattern.tokens):
+        return False
+    literal = PATTERN_SYNTAX.sub('', word)
+    return '*' in literal or any(char.isalpha() for char in literal)
+
+def restore_line(words, trie, mode='best', corrections=None, extended=False):
+    # Restores one tokenized line; all wildcard words are matched in one batch.
+    # corrections, if given, memoizes fuzzy candidates per lowercase word across lines.
+    # extended enables class and gap syntax (see is_pattern).
+    k, format_word = RESTORE_MODES[mode]
+    patterns = [w.lower() for w in words if is_pattern(w, extended)]
+    unknown = [w.lower() for w in words if mode == 'fuzzy' and needs_correction(w, trie)]
+    if not patterns and not unknown:
+        return ' '.join(words)
+    matches = match_patterns(patterns, trie, k) if patterns else {}
+    for word in unknown:
+        if corrections is None:
+            matches[word] = correct_word(word, trie, k)
+            continue
+        if word not in corrections:
+            corrections[word] = correct_word(word, trie, k)
+        matches[word] = corrections[word]
+    return ' '.join(format_word(w, matches[w.lower()]) if w.lower() in matches else w for w in words)
+
+def tokenize_lines(lines):
+    # Tokenize stage: yields the whitespace-separated words of each line
+    for line in lines:
+        yield line.split()
+
+def restore_tokens(token_lines, trie, mode='best', extended=False):
+    # Restore stage: yields each tokenized line restored and joined back into text
+    if mode not in RESTORE_MODES:
+        raise ValueError(f"Unknown restore mode '{mode}', expected one of {sorted(RESTORE_MODES)}")
+    corrections = {} if mode == 'fuzzy' else None  # Each misspelling is corrected once per file
+    return (restore_line(words, trie, mode, corrections, extended) for words in token_lines)
+
+def iter_restored_lines(fileobj, trie, mode='best', extended=False):
+    """
+    Lazily restore the lines of an open text file (or any iterable of lines).
+    mode is 'best' (each wildcard word becomes <best match>), 'all' (each
+    wildcard word becomes the list of all matches) or 'fuzzy' ('best', plus
+    each unknown word becomes <closest dictionary word>, corrected once per
+    file, or per chunk in parallel mode). Words with classes ('[ce]at') or
+    gaps ('Qu%k') are only restored when extended is True. Yields restored lines without trailing
+    newlines, one at a time, so the output can be fed to other consumers
+    without buffering the whole document.
+    """
+    return restore_tokens(tokenize_lines(fileobj), trie, mode, extended)
+
+# Dictionary of the current worker process, built once by _init_worker
+_worker_trie = None
+
+def _init_worker(trie_class, word_freqs, answer_table=None):
+    # Runs once per worker process: rebuild the dictionary so tasks only carry text.
+    # answer_table is (max_length, k) when the parent's trie had one enabled.
+    global _worker_trie
+    if answer_table is not None:
+        trie_class = PrefixTrie  # The worker's copy is private, so it need not be a read-only snapshot
+    _worker_trie = trie_class.from_pairs(word_freqs)
+    if answer_table is not None:
+        _worker_trie.enable_answer_table(*answer_table)
+
+def _restore_chunk(lines, mode, extended):
+    # Worker task: restore one chunk of lines with the worker's own dictionary
+    return list(iter_restored_lines(lines, _worker_trie, mode, extended))
+
+def _read_chunks(fileobj, chunk_lines):
+    # Splits the input on line boundaries into lists of at most chunk_lines lines
+    chunk = []
+    for line in fileobj:
+        chunk.append(line)
+        if len(chunk) == chunk_lines:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def iter_restored_lines_parallel(fileobj, trie, mode='best', workers=None, chunk_lines=CHUNK_LINES,
+                                 extended=False):
+    """
+    Parallel version of iter_restored_lines. Chunks of lines are restored in a
+    process pool whose workers each load the dictionary once at start-up, and
+    restored lines are yielded in the original order. At most two chunks per
+    worker are in flight, so memory stays bounded for any input size. Workers
+    rebuild the trie's answer table too, if it has one.
+    """
+    if mode not in RESTORE_MODES:
+        raise ValueError(f"Unknown restore mode '{mode}', expected one of {sorted(RESTORE_MODES)}")
+    workers = workers or os.cpu_count() or 1
+    table = getattr(trie, 'answer_table', None)
+    initargs = (type(trie), trie.get_all_words(), (table.max_length, table.k) if table is not None else None)
+
+    def _generate():
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+            pending = deque()
+            for chunk in _read_chunks(fileobj, chunk_lines):
+                pending.append(pool.submit(_restore_chunk, chunk, mode, extended))
+                if len(pending) >= workers * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    return _generate()
+
+def write_lines(lines, outfile):
+    # Write stage: writes each restored line as it is produced
+    for line in lines:
+        outfile.write(line + '\n')
+
 def match_case_pattern(original, matched):
     # Applies the capitalization pattern of `original` to `matched`
+    if GAP in original:
+        original = original[:original.index(GAP)]  # Positions after a gap no longer line up
+    if '[' in original:
+        # A class stands for one character, capitalized if its letters are
+        original = re.sub(r'\[\^?.[^\]]*\]', lambda m: 'A' if m.group().isupper() else 'a', original)
     result = []
     for o_char, m_char in zip(original, matched):
         if o_char.isupper():
@@ -96,4 +293,4 @@ def match_case_pattern(original, matched):
             result.append(m_char.lower())
     # Append any remaining characters in matched (lowercase)
     result.extend(matched[len(original):])
-    return ''.join(result)
\ No newline at end of file
+    return ''.join(result)
@@ -3,32 +3,597 @@
 # Shu Zhi and Ashley
 # DAAA/2A/03
 
+import bisect
+import functools
+import gc
 import re
-from collections import defaultdict
+import heapq
+import itertools
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict, OrderedDict
+
+from trie_snapshot import FrozenTrie, MappedTrie, write_snapshot
 
 class TrieNode:
     """
     Node class for the prefix trie data structure.
     Each node represents a character and can be marked as terminal (end of word).
+    Uses __slots__: a trie holds one node per character, so a per-node
+    attribute dictionary would dominate its memory use.
     """
-    def __init__(self):
+    __slots__ = ("children", "child_mask", "is_terminal", "frequency", "word", "max_freq",
+                 "term_count", "freq_sum", "min_depth", "max_depth", "generation", "lengths", "top")
+
+    def __init__(self, generation=0):
         self.children = {}  # Dictionary to store child nodes
+        self.child_mask = 0  # char_bit(c) set for each child character c (see CharClass)
         self.is_terminal = False  # Marks if this node represents end of a word
         self.frequency = 0  # Frequency of the word ending at this node
         self.word = ""  # The complete word ending at this node
-        
+        self.max_freq = -1  # Highest terminal frequency in this subtree (-1 if none)
+        self.term_count = 0  # Number of words in this subtree
+        self.freq_sum = 0  # Sum of the frequencies of the words in this subtree
+        self.min_depth = -1  # Distance to the shallowest word below (0 = this node, -1 if none)
+        self.max_depth = -1  # Distance to the deepest word below (-1 if none)
+        self.generation = generation  # Trie generation that created (and may edit) this node
+        # Words below by distance, {distance: (word count, frequency sum, maximum
+        # frequency)}; kept only on nodes at most LENGTH_TABLE_DEPTH deep, else None.
+        # The maximum may overestimate (see PrefixTrie._refresh_lengths).
+        self.lengths = None
+        # top, the best COMPLETION_LIST_SIZE (-frequency, word) in this subtree, best
+        # first, is only set while the trie's completion lists are enabled
+
+    def refresh_bounds(self):
+        """
+        Recompute max_freq, min_depth and max_depth from this node and its children.
+        Returns True if any of them changed.
+        """
+        best = self.frequency if self.is_terminal else -1
+        shallow = 0 if self.is_terminal else -1
+        deep = 0 if self.is_terminal else -1
+        for child in self.children.values():
+            if child.max_freq > best:
+                best = child.max_freq
+            if child.min_depth >= 0:
+                if shallow < 0 or child.min_depth + 1 < shallow:
+                    shallow = child.min_depth + 1
+                if child.max_depth + 1 > deep:
+                    deep = child.max_depth + 1
+        changed = (best, shallow, deep) != (self.max_freq, self.min_depth, self.max_depth)
+        self.max_freq, self.min_depth, self.max_depth = best, shallow, deep
+        return changed
+
+    def refresh_totals(self):
+        """Recompute term_count and freq_sum from this node and its children."""
+        count = 1 if self.is_terminal else 0
+        total = self.frequency if self.is_terminal else 0
+        for child in self.children.values():
+            count += child.term_count
+            total += child.freq_sum
+        self.term_count, self.freq_sum = count, total
+
+    def refresh_lengths(self, deep):
+        """
+        Recompute lengths from this node's word and its children's tables, or,
+        if deep is True (the children keep no tables), by walking the subtree.
+        """
+        lengths = {0: (1, self.frequency, self.frequency)} if self.is_terminal else {}
+        if deep:
+            words = []
+            stack = [(child, 1) for child in self.children.values()]
+            while stack:
+                node, distance = stack.pop()
+                if node.is_terminal:
+                    words.append((distance, 1, node.frequency, node.frequency))
+                stack.extend((child, distance + 1) for child in node.children.values())
+        else:
+            words = [(distance + 1, count, total, best)
+                     for child in self.children.values()
+                     for distance, (count, total, best) in child.lengths.items()]
+        for distance, count, total, best in words:
+            entry = lengths.get(distance)
+            if entry is not None:
+                count, total, best = count + entry[0], total + entry[1], max(best, entry[2])
+            lengths[distance] = (count, total, best)
+        self.lengths = lengths
+
+    def length_max(self, distance):
+        """
+        Return the highest frequency of the words exactly distance below this
+        node (-1 if none), from the children's tables.
+        """
+        if distance == 0:
+            return self.frequency if self.is_terminal else -1
+        best = -1
+        for child in self.children.values():
+            words = child.lengths.get(distance - 1)
+            if words is not None and words[2] > best:
+                best = words[2]
+        return best
+
+    def refresh_top(self):
+        """
+        Recompute top from this node's word and its children's lists. Entries
+        are (-frequency, word), so plain tuple order ranks them. A non-word
+        node with one child shares the child's tuple.
+        """
+        children = self.children
+        if not children:
+            self.top = ((-self.frequency, self.word),) if self.is_terminal else ()
+            return
+        if len(children) == 1 and not self.is_terminal:
+            for child in children.values():
+                self.top = child.top
+            return
+        lists = [child.top for child in children.values()]
+        if self.is_terminal:
+            lists.append(((-self.frequency, self.word),))
+        if len(lists) > 2:
+            # Many short sorted lists: merge only as far as needed
+            self.top = tuple(itertools.islice(heapq.merge(*lists), COMPLETION_LIST_SIZE))
+        else:
+            self.top = tuple(sorted(itertools.chain(*lists))[:COMPLETION_LIST_SIZE])
+
     def __str__(self):
         return f"Node(terminal={self.is_terminal}, freq={self.frequency}, word='{self.word}')"
 
+class _RankedMatch:
+    """
+    Heap entry for top-k selection. Ordered so that the worst match sorts first:
+    lower frequency is worse, and for equal frequency the alphabetically later
+    word is worse. A min-heap of these therefore keeps the weakest of the k
+    best matches at heap[0].
+    """
+    __slots__ = ("frequency", "word")
+
+    def __init__(self, frequency, word):
+        self.frequency = frequency
+        self.word = word
+
+    def __lt__(self, other):
+        if self.frequency != other.frequency:
+            return self.frequency < other.frequency
+        return self.word > other.word
+
+COMPLETION_LIST_SIZE = 10  # Completions kept at every node for PrefixTrie.complete
+LENGTH_TABLE_DEPTH = 2  # Deepest nodes that keep per-length word totals (TrieNode.lengths)
+MALFORMED_REPORT_LIMIT = 10  # Malformed input lines listed by read_keywords_from_file
+READ_BLOCK_SIZE = 1 << 20  # Characters read per block by bulk_load
+
+def parse_keyword_blocks(file, malformed):
+    """
+    Parse a word,frequency file read in large blocks.
+    Yields (word, frequency) with the word lowercased and stripped, and appends
+    (line_number, line) to malformed for lines that cannot be parsed.
+    Shared by every dictionary's file loader (PrefixTrie, RadixTrie, BitmapIndex).
+    """
+    line_number = 0
+    leftover = ""
+    while True:
+        block = file.read(READ_BLOCK_SIZE)
+        if not block:
+            lines = [leftover] if leftover else []
+        else:
+            lines = (leftover + block).split('\n')
+            leftover = lines.pop()  # Possibly incomplete last line
+        for line in lines:
+            line_number += 1
+            word, comma, rest = line.partition(',')
+            word = word.strip().lower()
+            if not comma:
+                if word:
+                    yield word, 1
+                continue
+            try:
+                frequency = int(rest)
+            except ValueError:
+                malformed.append((line_number, line.rstrip('\r')))
+                continue
+            if word:
+                yield word, frequency
+            else:
+                malformed.append((line_number, line.rstrip('\r')))
+        if not block:
+            return
+
+GAP = '%'  # Pattern token matching zero or more characters: '%', '%{n}', '%{m,n}' or '%{m,}'
+
+WIDE_BIT = 1 << 128  # child_mask bit shared by every non-ASCII character
+
+def char_bit(char):
+    """
+    Return the child_mask bit of a character. Each ASCII character has its own
+    bit, the lowercase letters the lowest 26 so that the masks of ordinary
+    words stay small ints; every other character shares WIDE_BIT, and the
+    children of a node that has it are scanned instead.
+    """
+    code = ord(char)
+    return 1 << ((code - 97) & 127) if code < 128 else WIDE_BIT
+
+class CharClass:
+    """
+    Pattern token matching one character from a set, written '[ce]' (c or e),
+    '[a-e]' (a range) or '[^ce]' (any character but c or e). mask has the
+    char_bit of each listed ASCII character, so it can be ANDed with a node's
+    child_mask to find the matching children without scanning them all;
+    listed non-ASCII characters are kept in wide.
+    """
+    __slots__ = ("chars", "negated", "mask", "wide")
+
+    def __init__(self, chars, negated=False):
+        self.chars = chars  # Listed characters, sorted
+        self.negated = negated
+        self.mask = 0
+        for char in chars:
+            if ord(char) < 128:
+                self.mask |= char_bit(char)
+        self.wide = frozenset(char for char in chars if ord(char) >= 128)
+        if self.wide and not negated:
+            self.mask |= WIDE_BIT  # Nodes with non-ASCII children must be scanned
+
+    def contains(self, char):
+        """Return True if char matches the class."""
+        if ord(char) < 128:
+            return bool(self.mask & char_bit(char)) != self.negated
+        return (char in self.wide) != self.negated
+
+    def select(self, node):
+        """
+        Return the (character, child) pairs of node whose character matches.
+        Time Complexity: O(1) when no child matches, else O(min(c, class size))
+        """
+        bits = node.child_mask & ~self.mask if self.negated else node.child_mask & self.mask
+        if not bits:
+            return ()
+        children = node.children
+        if bits & WIDE_BIT:
+            return [(char, child) for char, child in children.items() if self.contains(char)]
+        if not self.negated and len(self.chars) < len(children):
+            return [(char, children[char]) for char in self.chars if char in children]
+        return [(char, child) for char, child in children.items() if bits & char_bit(char)]
+
+    def __repr__(self):
+        return f"[{'^' if self.negated else ''}{''.join(self.chars)}]"
+
+class CompiledPattern:
+    """
+    A pattern parsed once so repeated queries skip parsing (see
+    compile_pattern). tokens holds one entry per pattern element: a
+    character, '*', a CharClass, or (GAP, limit) for an optional run of at
+    most limit characters (None for no limit). The query methods accept a
+    CompiledPattern wherever they accept a pattern string.
+    """
+    __slots__ = ("text", "tokens", "has_gap", "length", "_regex", "_reversed")
+
+    def __init__(self, text, tokens):
+        self.text = text  # Source pattern, used for cache keys and statistics
+        self.tokens = tokens
+        self.has_gap = any(isinstance(token, tuple) for token in tokens)
+        self.length = None if self.has_gap else len(tokens)  # Length of every matching word
+        self._regex = None
+        self._reversed = None
+
+    def matches(self, word):
+        """Return True if word matches the pattern."""
+        if self._regex is None:
+            parts = []
+            for token in self.tokens:
+                if isinstance(token, tuple):
+                    parts.append('.*' if token[1] is None else f'.{{0,{token[1]}}}')
+                elif isinstance(token, CharClass):
+                    parts.append(f"[{'^' if token.negated else ''}{re.escape(''.join(token.chars))}]")
+                else:
+                    parts.append('.' if token == '*' else re.escape(token))
+            self._regex = re.compile(''.join(parts), re.DOTALL)
+        return self._regex.fullmatch(word) is not None
+
+    def reversed(self):
+        """Return the pattern matching the reversed words (for the suffix trie)."""
+        if self._reversed is None:
+            self._reversed = CompiledPattern(self.text[::-1], self.tokens[::-1])
+            self._reversed._reversed = self
+        return self._reversed
+
+    def __repr__(self):
+        return f"CompiledPattern('{self.text}')"
+
+def compile_pattern(pattern):
+    """
+    Parse a pattern string into a reusable CompiledPattern ('*' one
+    character, '[ce]'/'[^ce]' character classes, '%' gaps). Compiled patterns
+    are passed through unchanged, and recently compiled strings are reused.
+    Raises ValueError for malformed classes or gap bounds.
+    """
+    if isinstance(pattern, CompiledPattern):
+        return pattern
+    return _compile_pattern(pattern)
+
+@functools.lru_cache(maxsize=1024)
+def _compile_pattern(pattern):
+    tokens = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        i += 1
+        if char == '[':
+            negated = pattern.startswith('^', i)
+            first = i + negated
+            end = pattern.find(']', first + 1)  # A ']' right after '[' or '[^' is a listed character
+            if end < 0:
+                raise ValueError(f"Unclosed character class in pattern '{pattern}'.")
+            body = pattern[first:end]
+            chars = set()
+            j = 0
+            while j < len(body):
+                if j + 2 < len(body) and body[j + 1] == '-':
+                    if body[j] > body[j + 2]:
+                        raise ValueError(f"Invalid range '{body[j:j + 3]}' in pattern '{pattern}'.")
+                    chars.update(chr(code) for code in range(ord(body[j]), ord(body[j + 2]) + 1))
+                    j += 3
+                else:
+                    chars.add(body[j])
+                    j += 1
+            tokens.append(CharClass(tuple(sorted(chars)), negated))
+            i = end + 1
+            continue
+        if char != GAP:
+            tokens.append(char)
+            continue
+        low, high = 0, None
+        if i < len(pattern) and pattern[i] == '{':
+            end = pattern.find('}', i)
+            bounds = pattern[i + 1:end].split(',') if end > 0 else []
+            try:
+                if len(bounds) == 1:
+                    low = high = int(bounds[0])
+                elif len(bounds) == 2:
+                    low = int(bounds[0]) if bounds[0].strip() else 0
+                    high = int(bounds[1]) if bounds[1].strip() else None
+                else:
+                    raise ValueError
+                if low < 0 or (high is not None and high < low):
+                    raise ValueError
+            except ValueError:
+                raise ValueError(f"Invalid gap bounds in pattern '{pattern}'. "
+                                 "Use %, %{n}, %{m,n} or %{m,}.") from None
+            i = end + 1
+        # A bounded gap '%{m,n}' is m '*' tokens followed by an optional run of n - m
+        tokens.extend('*' * low)
+        if high is None or high > low:
+            limit = None if high is None else high - low
+            if tokens and isinstance(tokens[-1], tuple):
+                # Adjacent gaps ('%%') act as one
+                previous = tokens.pop()[1]
+                limit = None if limit is None or previous is None else limit + previous
+            tokens.append((GAP, limit))
+    return CompiledPattern(pattern, tuple(tokens))
+
+class PatternCache:
+    """
+    LRU cache of wildcard query results for a PrefixTrie.
+    Entries are keyed by (query type, pattern, ...) and also indexed by pattern
+    length, so a changed word only invalidates the cached patterns of the same
+    length that could match it, rather than the whole cache. Patterns with a
+    gap (%) match words of many lengths and are checked on every change.
+    Keys hold the pattern text, also for queries made with a CompiledPattern.
+    """
+    def __init__(self, max_size=1024):
+        self.max_size = max_size  # 0 disables caching
+        self.entries = OrderedDict()  # key -> cached result, least recently used first
+        self.keys_by_length = defaultdict(set)  # pattern length (GAP for gap patterns) -> keys
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return the cached result for key (marking it recently used), or None."""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, result):
+        """Store a result, evicting the least recently used entry when full."""
+        if self.max_size <= 0:
+            return
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        self.keys_by_length[self._length_key(key[1])].add(key)
+        while len(self.entries) > self.max_size:
+            old_key, _ = self.entries.popitem(last=False)
+            self._unindex(old_key)
+
+    def invalidate_word(self, word):
+        """
+        Drop every cached pattern that could match word.
+        Time Complexity: O(p * m) where p is the number of cached patterns of length m
+        """
+        if not self.entries:
+            return
+        keys = self.keys_by_length.get(len(word), set()) | self.keys_by_length.get(GAP, set())
+        if not keys:
+            return
+        stale = [key for key in keys if self._pattern_matches(key[1], word)]
+        for key in stale:
+            del self.entries[key]
+            self._unindex(key)
+        self.invalidations += len(stale)
+
+    def clear(self):
+        """Remove all cached results (counters are kept)."""
+        self.entries.clear()
+        self.keys_by_length.clear()
+
+    def info(self):
+        """Return cache statistics as a dictionary."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "size": len(self.entries),
+            "max_size": self.max_size,
+        }
+
+    def _unindex(self, key):
+        length_key = self._length_key(key[1])
+        keys = self.keys_by_length[length_key]
+        keys.discard(key)
+        if not keys:
+            del self.keys_by_length[length_key]
+
+    @staticmethod
+    def _length_key(pattern):
+        length = compile_pattern(pattern).length
+        return GAP if length is None else length
+
+    @staticmethod
+    def _pattern_matches(pattern, word):
+        return compile_pattern(pattern).matches(word)
+
+class SharedPatternCache(PatternCache):
+    """
+    PatternCache that can be used from several threads at once, for a
+    TrieSnapshot shared by concurrent readers. A snapshot never changes, so
+    its entries are never invalidated.
+    """
+    def __init__(self, max_size=1024):
+        super().__init__(max_size)
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            return super().get(key)
+
+    def put(self, key, result):
+        with self.lock:
+            super().put(key, result)
+
+    def clear(self):
+        with self.lock:
+            super().clear()
+
+    def info(self):
+        with self.lock:
+            return super().info()
+
+class QueryStats:
+    """
+    Opt-in per-query-type counters for a PrefixTrie: calls, cache hits, nodes
+    visited, branches pruned, matches produced and wall time, plus a bounded
+    heap of the slowest individual patterns.
+    """
+    def __init__(self, slowest_limit=20):
+        self.slowest_limit = slowest_limit
+        self.queries = {}  # query type -> counters
+        self.slowest = []  # min-heap of (seconds, query type, pattern, nodes visited)
+        self.lock = threading.Lock()  # Snapshots record into their trie's stats from other threads
+
+    def _counters(self, query):
+        counters = self.queries.get(query)
+        if counters is None:
+            counters = self.queries[query] = {
+                "calls": 0, "cache_hits": 0, "nodes_visited": 0,
+                "branches_pruned": 0, "matches": 0, "time_s": 0.0,
+            }
+        return counters
+
+    def record(self, query, pattern, elapsed, visited, pruned, matches):
+        """Add one traversal to the counters of its query type."""
+        entry = (elapsed, query, pattern, visited)
+        with self.lock:
+            counters = self._counters(query)
+            counters["calls"] += 1
+            counters["nodes_visited"] += visited
+            counters["branches_pruned"] += pruned
+            counters["matches"] += matches
+            counters["time_s"] += elapsed
+            if len(self.slowest) < self.slowest_limit:
+                heapq.heappush(self.slowest, entry)
+            elif entry > self.slowest[0]:
+                heapq.heapreplace(self.slowest, entry)
+
+    def record_cache_hit(self, query):
+        """Count a query answered from the pattern cache."""
+        with self.lock:
+            counters = self._counters(query)
+            counters["calls"] += 1
+            counters["cache_hits"] += 1
+
+    def summary(self):
+        """Return {query type: counters} including the average time per traversal."""
+        summary = {}
+        with self.lock:
+            for query, counters in self.queries.items():
+                traversals = counters["calls"] - counters["cache_hits"]
+                summary[query] = dict(counters, avg_time_us=counters["time_s"] / traversals * 1e6 if traversals else 0.0)
+        return summary
+
+    def slowest_patterns(self, n=None):
+        """Return up to n (seconds, query type, pattern, nodes visited), slowest first."""
+        with self.lock:
+            return sorted(self.slowest, reverse=True)[:n]
+
+_node_object_bytes = None  # Measured size of one TrieNode, set by _measure_node_object
+
+def _measure_node_object():
+    """
+    Return the bytes allocated for one TrieNode object and its attribute
+    values, not counting its children dictionary. Measured once with
+    tracemalloc, because sys.getsizeof does not see the inline attribute
+    values of modern CPython objects.
+    """
+    global _node_object_bytes
+    if _node_object_bytes is None:
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        sample_size = 1000
+        holder = [None] * sample_size
+        before = tracemalloc.get_traced_memory()[0]
+        for i in range(sample_size):
+            holder[i] = TrieNode()
+        used = tracemalloc.get_traced_memory()[0] - before
+        if not tracing:
+            tracemalloc.stop()
+        _node_object_bytes = used // sample_size - sys.getsizeof(holder[0].children)
+    return _node_object_bytes
+
+def _writer(method):
+    # Runs a PrefixTrie edit under the trie's write lock, so snapshot() never sees it half done
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        with self._write_lock:
+            return method(self, *args, **kwargs)
+    return locked
+
 class PrefixTrie:
     """
     Prefix Trie implementation for storing and searching words efficiently.
     Supports adding, deleting, searching, and pattern matching with wildcards.
     """
-    def __init__(self):
+    # The path to a node spells the start of every word below it, so comparing
+    # paths orders words alphabetically (used to break frequency ties early)
+    ordered_paths = True
+
+    def __init__(self, cache_size=1024):
         self.root = TrieNode()
         self.size = 0  # Number of words in the trie
+        self.index = {}  # word -> terminal TrieNode, for constant-time exact lookups
+        self.cache = PatternCache(cache_size)  # LRU cache of wildcard query results
+        self.query_stats = None  # QueryStats while instrumentation is enabled
+        self.suffix_trie = None  # _SuffixTrie of the reversed words while enabled
+        self.answer_table = None  # _AnswerTable of short pattern answers while enabled
+        self.completion_lists = False  # Per-node completion lists (TrieNode.top) kept while enabled
+        self.generation = 0  # Nodes of older generations are shared with snapshots and never edited
+        self._snapshot = None  # Latest TrieSnapshot, reused while the trie is unchanged
+        self._write_lock = threading.RLock()
         
+    @_writer
     def add_keyword(self, word, frequency=1):
         """
         Add a word to the trie with given frequency.
@@ -39,13 +604,15 @@ class PrefixTrie:
             return
             
         word = word.lower().strip()
-        node = self.root
+        path = self._writable_path(word)
+        node = path[-1]
         
-        # Traverse/create nodes for each character
-        for char in word:
-            if char not in node.children:
-                node.children[char] = TrieNode()
-            node = node.children[char]
+        # Create the nodes for the characters not in the trie yet
+        for char in word[len(path) - 1:]:
+            child = node.children[char] = TrieNode(self.generation)
+            node.child_mask |= char_bit(char)
+            path.append(child)
+            node = child
             
         # Mark the end of word and update frequency
         if not node.is_terminal:
@@ -53,29 +620,378 @@ class PrefixTrie:
             node.is_terminal = True
             node.word = word
             node.frequency = frequency
+            self.index[word] = node
+            self._word_changed(word, path, 1, frequency)
         else:
             node.frequency += frequency
+            self._word_changed(word, path, 0, frequency)
+
+    def _word_changed(self, word, path, count_delta, freq_delta):
+        """
+        Bring derived data up to date after the word at the end of path was
+        added, deleted or had its frequency changed. count_delta and freq_delta
+        are the changes in the number of words and total frequency below each
+        node on the path.
+        """
+        self._refresh_path(word, path, count_delta, freq_delta)
+        if self.completion_lists:
+            self._update_completions(word, path)
+        self.cache.invalidate_word(word)
+        if self.suffix_trie is not None:
+            self.suffix_trie.mirror(word, count_delta, freq_delta)
+        if self.answer_table is not None:
+            self.answer_table.update(word, self)
+
+    def _refresh_path(self, word, path, count_delta, freq_delta):
+        """
+        Update the subtree aggregates of the nodes on a root-to-node path after
+        the word at the end of the path was added, deleted or edited.
+        Word counts and frequency sums are adjusted by the deltas. When a word
+        is added or its frequency raised, the maximum frequency and word depths
+        can only grow, so each node is updated in O(1) from the word itself.
+        After a delete or a decrease, a node's children are rescanned only if
+        its bounds could have come from the word. Both walks go bottom-up and
+        stop at the first node left unchanged.
+        Time Complexity: O(m) for additions and increases, O(m * c) otherwise,
+        where c is the branching factor along the path
+        """
+        if count_delta >= 0 and freq_delta >= 0:
+            frequency = path[-1].frequency
+            distance = len(word) - len(path) + 1  # From the last node on the path to the word
+            growing = True
+            for node in reversed(path):
+                node.term_count += count_delta
+                node.freq_sum += freq_delta
+                if growing:
+                    growing = False
+                    if frequency > node.max_freq:
+                        node.max_freq = frequency
+                        growing = True
+                    if node.min_depth < 0 or distance < node.min_depth:
+                        node.min_depth = distance
+                        growing = True
+                    if distance > node.max_depth:
+                        node.max_depth = distance
+                        growing = True
+                    distance += 1
+            self._refresh_lengths(word, path, count_delta, freq_delta, None)
+            return
+        for node in path:
+            node.term_count += count_delta
+            node.freq_sum += freq_delta
+        length = len(word)
+        last = len(path) - 1
+        if count_delta > 0:
+            old_frequency = None  # A new word with a negative frequency: rescan the path
+        else:
+            old_frequency = -freq_delta if count_delta < 0 else path[-1].frequency - freq_delta
+        for depth in range(last, -1, -1):
+            node = path[depth]
+            distance = length - depth
+            if depth < last and old_frequency is not None and node.max_freq != old_frequency and (
+                    count_delta == 0 or (node.min_depth != distance and node.max_depth != distance)):
+                break  # Its bounds come from other words, and so do those of the nodes above
+            if not node.refresh_bounds() and depth < last:
+                break
+        self._refresh_lengths(word, path, count_delta, freq_delta, old_frequency)
+
+    def _refresh_lengths(self, word, path, count_delta, freq_delta, old_frequency):
+        """
+        Update the per-length tables (TrieNode.lengths) of the nodes on the
+        path at most LENGTH_TABLE_DEPTH deep, bottom-up. Only the entry for the
+        word's length changes. Its maximum is recomputed from the children's
+        tables when the word held it and old_frequency (the word's frequency
+        before a delete or decrease, else None) shows that it may have dropped.
+        The deepest tables have no children's tables to recompute from and
+        keep the old maximum: it stays an upper bound, which is all the
+        searches need, and is made exact again by the next rebuild.
+        Time Complexity: O(LENGTH_TABLE_DEPTH * c) where c is the branching factor
+        """
+        frequency = path[-1].frequency if count_delta >= 0 else None
+        length = len(word)
+        for depth in range(min(len(path) - 1, LENGTH_TABLE_DEPTH), -1, -1):
+            node = path[depth]
+            if node.lengths is None:
+                node.lengths = {}
+            distance = length - depth
+            count, total, best = node.lengths.get(distance, (0, 0, -1))
+            count += count_delta
+            if not count:
+                del node.lengths[distance]
+                continue
+            if old_frequency is not None and best == old_frequency and (
+                    depth < LENGTH_TABLE_DEPTH or distance == 0):
+                best = node.length_max(distance)
+            elif frequency is not None and frequency > best:
+                best = frequency
+            node.lengths[distance] = (count, total + freq_delta, best)
+
+    def _update_completions(self, word, path):
+        """
+        Update the completion lists (TrieNode.top) on a root-to-node path after
+        word was added, deleted or had its frequency changed, bottom-up. The
+        word is inserted, moved or removed in each list; when it falls out of
+        a full list, the freed place is refilled from the children's lists.
+        The walk stops at the first list the word neither was nor is in: no
+        ancestor's list can change after that.
+        Time Complexity: O(m * (K + c log K)) where K is COMPLETION_LIST_SIZE
+        and c the branching factor along the path
+        """
+        node = self.index.get(word)
+        entry = (-node.frequency, word) if node is not None else None
+        size = COMPLETION_LIST_SIZE
+        for node in reversed(path):
+            top = getattr(node, "top", ())  # Nodes created by this edit have no list yet
+            if len(node.children) == 1 and not node.is_terminal:
+                for child in node.children.values():
+                    node.top = child.top  # Same words as the only child
+                continue
+            old = None
+            for item in top:
+                if item[1] == word:
+                    old = item
+                    break
+            if old == entry or (old is None and (entry is None or (len(top) == size and entry > top[-1]))):
+                break  # This list, and so every list above it, is unchanged
+            items = [item for item in top if item is not old] if old is not None else list(top)
+            last = top[-1] if top else None
+            if old is not None and len(top) == size and (entry is None or entry > last):
+                # The word fell out of a full list. Every entry of the children's lists
+                # up to the old last one is already here, so the refill is the best
+                # entry after it in any child's list (or this node's own word).
+                refill = None
+                for child in node.children.values():
+                    child_top = child.top
+                    i = bisect.bisect_right(child_top, last)
+                    if i < len(child_top) and (refill is None or child_top[i] < refill):
+                        refill = child_top[i]
+                if node.is_terminal:
+                    own = (-node.frequency, node.word)
+                    if own > last and (refill is None or own < refill):
+                        refill = own
+                if refill is not None:
+                    items.append(refill)
+            elif entry is not None:
+                bisect.insort(items, entry)
+            node.top = tuple(items[:size])
             
+    def _writable_path(self, word):
+        """
+        Like _path_to, but any node on the path that is shared with a snapshot
+        is first replaced by a copy (path copying), so the returned nodes can
+        be edited without changing what the snapshot sees.
+        Time Complexity: O(m) where m is the length of the word
+        """
+        generation = self.generation
+        node = self.root
+        if node.generation != generation:
+            node = self.root = self._copy_node(node, "")
+        path = [node]
+        for depth, char in enumerate(word, 1):
+            child = node.children.get(char)
+            if child is None:
+                break
+            if child.generation != generation:
+                child = node.children[char] = self._copy_node(child, word[:depth])
+            path.append(child)
+            node = child
+        return path
+
+    def _copy_node(self, node, key):
+        # Copy of a snapshot-shared node for the current generation; it shares the
+        # original's children. key is the word spelled by the path to the node.
+        copy = TrieNode(self.generation)
+        copy.children = dict(node.children)
+        copy.child_mask = node.child_mask
+        copy.is_terminal = node.is_terminal
+        copy.frequency = node.frequency
+        copy.word = node.word
+        copy.max_freq = node.max_freq
+        copy.term_count = node.term_count
+        copy.freq_sum = node.freq_sum
+        copy.min_depth = node.min_depth
+        copy.max_depth = node.max_depth
+        if node.lengths is not None:
+            copy.lengths = dict(node.lengths)
+        if self.completion_lists:
+            copy.top = node.top
+        if copy.is_terminal:
+            self.index[key] = copy
+        return copy
+
+    def snapshot(self):
+        """
+        Return a read-only TrieSnapshot of the current version of the trie,
+        for readers (such as long restore jobs on other threads) that must not
+        see edits made while they run.
+        Taking a snapshot is O(1): the snapshot shares every node with the
+        trie, and the trie moves to a new generation so that later edits copy
+        the nodes on the path they change instead of modifying shared ones.
+        Unchanged subtrees stay shared between all versions. While the trie is
+        unchanged, the same snapshot is returned.
+        """
+        with self._write_lock:
+            if self._snapshot is None or self._snapshot.root is not self.root:
+                self._snapshot = TrieSnapshot(self)
+                self.generation += 1
+            return self._snapshot
+
     def search_keyword(self, word):
         """
         Search for a word in the trie.
         Returns True if word exists, False otherwise.
+        Time Complexity: O(1) average, using the word index
+        """
+        if not word:
+            return False
+        return word.lower().strip() in self.index
+
+    def get_frequency(self, word):
+        """
+        Return the frequency of word, or None if it is not in the trie.
+        Time Complexity: O(1) average, using the word index
+        """
+        node = self.index.get(word.lower().strip()) if word else None
+        return node.frequency if node is not None else None
+
+    @_writer
+    def set_frequency(self, word, frequency):
+        """
+        Set the frequency of an existing word.
+        Returns True if the word was updated, False if it is not in the trie.
+        The word's node is found through the index in O(1); the subtree
+        aggregates of its ancestors are then updated along the path.
         Time Complexity: O(m) where m is the length of the word
         """
         if not word:
             return False
-            
         word = word.lower().strip()
+        node = self.index.get(word)
+        if node is None:
+            return False
+        delta = frequency - node.frequency
+        if delta:
+            path = self._writable_path(word)
+            path[-1].frequency = frequency
+            self._word_changed(word, path, 0, delta)
+        return True
+
+    @_writer
+    def update_frequencies(self, updates):
+        """
+        Apply many frequency changes in one pass.
+        updates is an iterable of (word, amount, is_delta): the word's frequency
+        is set to amount, or changed by amount if is_delta is True.
+        Returns (changed_count, unknown_words, rejected): the number of distinct
+        words whose frequency actually changed, the words not in the trie, and the
+        (word, amount, is_delta) updates that would make a frequency negative.
+        Words are found through the index and their new frequencies written
+        directly. Every ancestor of a changed word is marked dirty, and the
+        dirty nodes are then recomputed once each, deepest first, so upper
+        levels shared by many updated words are refreshed once rather than once
+        per word.
+        Time Complexity: O(u * m + d * c) for u updates touching d distinct nodes
+        """
+        index = self.index
+        dirty = defaultdict(set)  # depth -> nodes needing a refresh
+        original = {}  # word -> frequency before its first update, so repeated updates count once
+        unknown = []
+        rejected = []
+        for word, amount, is_delta in updates:
+            word = word.lower().strip()
+            node = index.get(word)
+            if node is None:
+                unknown.append(word)
+                continue
+            new_frequency = node.frequency + amount if is_delta else amount
+            if new_frequency < 0:
+                rejected.append((word, amount, is_delta))
+                continue
+            if new_frequency == node.frequency:
+                continue
+            path = self._writable_path(word)
+            original.setdefault(word, node.frequency)
+            path[-1].frequency = new_frequency
+            for depth, path_node in enumerate(path):
+                dirty[depth].add(path_node)
+
+        changed = [word for word, frequency in original.items() if index[word].frequency != frequency]
+        for depth in sorted(dirty, reverse=True):
+            for node in dirty[depth]:
+                node.refresh_bounds()
+                node.refresh_totals()
+                if depth <= LENGTH_TABLE_DEPTH:
+                    node.refresh_lengths(depth == LENGTH_TABLE_DEPTH)
+                if self.completion_lists:
+                    node.refresh_top()
+
+        if len(changed) > self.cache.max_size:
+            self.cache.clear()
+        else:
+            for word in changed:
+                self.cache.invalidate_word(word)
+        if self.suffix_trie is not None:
+            self.suffix_trie.update_frequencies((word[::-1], index[word].frequency, False) for word in changed)
+        if self.answer_table is not None:
+            for word in changed:
+                self.answer_table.update(word, self)
+        return len(changed), unknown, rejected
+
+    def starts_with(self, prefix):
+        """
+        Return True if any word in the trie starts with prefix.
+        Time Complexity: O(m) where m is the length of the prefix
+        """
+        prefix = prefix.lower().strip()
+        path = self._path_to(prefix)
+        return len(path) == len(prefix) + 1 and path[-1].term_count > 0
+
+    def complete(self, prefix, k=COMPLETION_LIST_SIZE):
+        """
+        Return up to k (word, frequency) completions of prefix: the words that
+        start with it (prefix itself included if it is a word), sorted by
+        frequency (descending), then alphabetically. k=None returns them all.
+        The subtree is expanded best first, in order of each branch's maximum
+        frequency. With enable_completions, every node keeps the best
+        COMPLETION_LIST_SIZE words of its subtree, so for k up to that size
+        this only walks down the prefix.
+        Time Complexity: O(m + k) for k <= COMPLETION_LIST_SIZE with completion
+        lists, else O(m + k * c log(k * c)), m the length of the prefix
+        """
+        prefix = prefix.lower().strip()
+        path = self._path_to(prefix)
+        if len(path) != len(prefix) + 1:
+            return []
+        node = path[-1]
+        if self.completion_lists and k is not None and k <= COMPLETION_LIST_SIZE:
+            return [(word, -negated) for negated, word in node.top[:k]]
+
+        completions = []
+        # Heap entries: (-frequency or -subtree bound, word or path, 1 for a subtree, node)
+        heap = [(-node.max_freq, prefix, 1, node)] if node.max_freq >= 0 else []
+        while heap and (k is None or len(completions) < k):
+            bound, text, is_subtree, node = heapq.heappop(heap)
+            if not is_subtree:
+                completions.append((text, -bound))
+                continue
+            if node.is_terminal:
+                heapq.heappush(heap, (-node.frequency, node.word, 0, None))
+            for char, child in node.children.items():
+                heapq.heappush(heap, (-child.max_freq, text + char, 1, child))
+        return completions
+
+    def _path_to(self, word):
+        # Nodes from the root along word, stopping where the trie has no next character
         node = self.root
-        
-        # Traverse the trie following the word
+        path = [node]
         for char in word:
-            if char not in node.children:
-                return False
-            node = node.children[char]
-            
-        return node.is_terminal
+            node = node.children.get(char)
+            if node is None:
+                break
+            path.append(node)
+        return path
         
+    @_writer
     def delete_keyword(self, word):
         """
         Delete a word from the trie.
@@ -86,63 +1002,878 @@ class PrefixTrie:
             return False
 
         word = word.lower().strip()
+        if word not in self.index:
+            return False  # word doesn't exist
 
-        def _delete_recursive(node, word, index):
-            if index == len(word):
-                if not node.is_terminal:
-                    return False, False  # word doesn't exist
-
-                # Unmark this node as a terminal
-                node.is_terminal = False
-                node.frequency = 0
-                node.word = ""
-                self.size -= 1
+        # Remember the path from the root for cleanup
+        path = self._writable_path(word)
+        node = path[-1]
+        del self.index[word]
 
-                # deleted = True, should_delete_node = (no children)
-                return True, len(node.children) == 0
+        # Unmark this node as a terminal
+        old_frequency = node.frequency
+        node.is_terminal = False
+        node.frequency = 0
+        node.word = ""
+        self.size -= 1
 
-            char = word[index]
-            if char not in node.children:
-                return False, False  # word doesn't exist
+        # Prune nodes that no longer lead to any word, from the bottom up
+        depth = len(word)
+        while depth > 0 and not path[depth].is_terminal and not path[depth].children:
+            parent, char = path[depth - 1], word[depth - 1]
+            del parent.children[char]
+            bit = char_bit(char)
+            if bit != WIDE_BIT or all(ord(other) < 128 for other in parent.children):
+                parent.child_mask &= ~bit
+            depth -= 1
 
-            deleted, should_delete_child = _delete_recursive(node.children[char], word, index + 1)
+        self._word_changed(word, path[:depth + 1], -1, -old_frequency)
+        return True
+        
+    def find_all_matches_with_freq(self, pattern):
+        """
+        Find all words matching a pattern with wildcards (*), character classes
+        ([ce], [^ce]) and gaps (%). '*' matches exactly one character, '[ce]'
+        one of the listed characters (ranges such as '[a-e]' allowed) and
+        '[^ce]' any other one; '%' matches any number of characters, '%{n}'
+        exactly n, '%{m,n}' between m and n and '%{m,}' at least m.
+        pattern may be a string or a CompiledPattern (see compile_pattern).
+        Returns a list of (word, frequency) sorted by frequency (descending),
+        then alphabetically. Results are served from the pattern cache when possible.
+        Time Complexity: O(n) where n is the number of nodes in the trie
+        """
+        stats = self.query_stats
+        pattern = compile_pattern(pattern)
+        key = ('all', pattern.text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            if stats is not None:
+                stats.record_cache_hit('all')
+            return list(cached)
 
-            if should_delete_child:
-                del node.children[char]
+        start = time.perf_counter() if stats is not None else 0.0
+        counts = [0, 0]  # [nodes visited, branches pruned]
+        trie, walk = self._plan(pattern)
+        results = list(trie._iter_matches(walk, counts))
+        results.sort(key=lambda x: (-x[1], x[0]))  # frequency descending, then alphabetically
+        self.cache.put(key, tuple(results))
+        if stats is not None:
+            stats.record('all', pattern.text, time.perf_counter() - start, counts[0], counts[1], len(results))
+        return results
 
-            # deleted remains True if we actually removed the word somewhere down the chain
-            return deleted, not node.is_terminal and len(node.children) == 0
+    def iter_matches(self, pattern):
+        """
+        Lazily yield (word, frequency) for each word matching a pattern with
+        wildcards (*), in trie order rather than sorted by frequency.
+        Callers that stop early only pay for the nodes visited so far.
+        Uses an explicit stack, so long words cannot hit the recursion limit, and
+        no strings are built during the walk: each terminal node already stores
+        its word.
+        Time Complexity: O(n) where n is the number of nodes visited
+        """
+        trie, walk = self._plan(compile_pattern(pattern))
+        return trie._iter_matches(walk)
 
-        deleted, _ = _delete_recursive(self.root, word, 0)
-        return deleted
+    def _iter_matches(self, pattern, counts=None):
+        # counts, if given, receives [nodes visited, branches pruned] once the walk completes
+        if pattern.has_gap:
+            yield from self._iter_gap_matches(pattern, counts)
+            return
+        tokens = pattern.tokens
+        length = len(tokens)
+        visited = pruned = 0
+        stack = [(self.root, 0)]
+        while stack:
+            node, i = stack.pop()
+            visited += 1
+            if not node.min_depth <= length - i <= node.max_depth:
+                pruned += 1  # No word below this node has the length the pattern needs
+                continue
+            if i == length:
+                if node.is_terminal:
+                    yield node.word, node.frequency
+                continue
+            char = tokens[i]
+            if char == '*':
+                for child in node.children.values():
+                    stack.append((child, i + 1))
+            elif isinstance(char, CharClass):
+                selected = char.select(node)
+                if not selected:
+                    pruned += 1
+                for _, child in selected:
+                    stack.append((child, i + 1))
+            else:
+                child = node.children.get(char)
+                if child is not None:
+                    stack.append((child, i + 1))
+                else:
+                    pruned += 1
+        if counts is not None:
+            counts[0] += visited
+            counts[1] += pruned
         
-    def find_all_matches_with_freq(self, pattern):
-        results = []
+    def match_many(self, patterns, k=None):
+        """
+        Match several wildcard patterns in a single traversal of the trie.
+        Returns a dictionary {pattern: [(word, frequency), ...]} with each list
+        ordered as in find_all_matches_with_freq (only the first k if k is given).
+        Patterns are walked together: at each node the active patterns are
+        grouped by their next character, so patterns that share a prefix, or
+        have wildcards at the same positions, visit the shared upper levels of
+        the trie once instead of once per pattern. Cached patterns are answered
+        from the pattern cache, and short patterns from the answer table when
+        it is enabled and holds at least k answers (see enable_answer_table),
+        skipping the walk.
+        Time Complexity: O(n + total matches) where n is the number of nodes visited
+        """
+        stats = self.query_stats
+        results = {}
+        pending = []
+        table = self.answer_table
+        if table is not None and (k is None or k > table.k):
+            table = None  # The table holds too few answers per pattern
+        for pattern in dict.fromkeys(patterns):  # Drop duplicates, keep order
+            compiled = compile_pattern(pattern)
+            answers = table.lookup(compiled.text) if table is not None else None
+            if answers is not None:
+                if stats is not None:
+                    stats.record_cache_hit('many')
+                results[pattern] = list(answers[:k])
+                continue
+            cached = self.cache.get(('all', compiled.text))
+            if cached is not None:
+                if stats is not None:
+                    stats.record_cache_hit('many')
+                results[pattern] = list(cached)
+            else:
+                results[pattern] = []
+                pending.append((pattern, compiled))
 
-        def dfs(node, i, path):
-            if i == len(pattern):
-                if node.is_terminal:
-                    results.append((path, node.frequency))
-                return
-            if pattern[i] == '*':
-                for char, child in node.children.items():
-                    dfs(child, i + 1, path + char)
-            elif pattern[i] in node.children:
-                dfs(node.children[pattern[i]], i + 1, path + pattern[i])
-        dfs(self.root, 0, '')
-        results.sort(key=lambda x: -x[1])  # sort by frequency descending
+        start = time.perf_counter() if stats is not None else 0.0
+        visited = pruned = 0
+        by_trie = defaultdict(list)  # trie to walk -> [(walked pattern, its matches list), ...]
+        for pattern, compiled in pending:
+            trie, walk = self._plan(compiled)
+            by_trie[trie].append((walk, results[pattern]))
+        for trie, planned in by_trie.items():
+            counts = trie._walk_many(planned)
+            visited += counts[0]
+            pruned += counts[1]
+
+        for pattern, compiled in pending:
+            matches = results[pattern]
+            matches.sort(key=lambda x: (-x[1], x[0]))
+            self.cache.put(('all', compiled.text), tuple(matches))
+        if stats is not None and pending:
+            stats.record('many', ' '.join(compiled.text for _, compiled in pending),
+                         time.perf_counter() - start, visited, pruned,
+                         sum(len(results[pattern]) for pattern, _ in pending))
+        if k is not None:
+            for pattern, matches in results.items():
+                del matches[k:]
         return results
 
+    @staticmethod
+    def _gap_limits(tokens):
+        # Fewest and most characters the tokens from each position can match (None: no limit)
+        count = len(tokens)
+        min_rest = [0] * (count + 1)
+        max_rest = [0] * (count + 1)
+        for pos in range(count - 1, -1, -1):
+            token = tokens[pos]
+            width = token[1] if isinstance(token, tuple) else 1
+            min_rest[pos] = min_rest[pos + 1] + (0 if isinstance(token, tuple) else 1)
+            max_rest[pos] = None if width is None or max_rest[pos + 1] is None else max_rest[pos + 1] + width
+        return min_rest, max_rest
+
+    @staticmethod
+    def _gap_steps(tokens, node, pos, used):
+        # States (node, token position, characters used by the gap) reached from a
+        # state by matching the token at pos, or by ending the current gap
+        token = tokens[pos]
+        if isinstance(token, tuple):
+            limit = token[1]
+            steps = [(node, pos + 1, 0)]  # The gap ends here
+            if limit is None:
+                steps.extend((child, pos, 0) for child in node.children.values())
+            elif used < limit:
+                steps.extend((child, pos, used + 1) for child in node.children.values())
+            return steps
+        if token == '*':
+            return [(child, pos + 1, 0) for child in node.children.values()]
+        if isinstance(token, CharClass):
+            return [(child, pos + 1, 0) for _, child in token.select(node)]
+        child = node.children.get(token)
+        return [(child, pos + 1, 0)] if child is not None else []
+
+    def _iter_gap_matches(self, pattern, counts=None):
+        """
+        Yield (word, frequency) for each word matching a pattern containing gaps
+        (%), in trie order. The walk is over states (node, token position,
+        characters used by the current gap); each state is expanded at most
+        once, so several gaps cannot make the search exponential. Expanded
+        states are remembered as sets of nodes, one per (position, used), so no
+        object is kept per state. Subtrees whose word depths cannot fit the
+        remaining tokens are skipped.
+        Time Complexity: O(n * t * g) for n nodes, t tokens and gap bound g (1 if unbounded)
+        """
+        tokens = pattern.tokens
+        count = len(tokens)
+        min_rest, max_rest = self._gap_limits(tokens)
+        visited = pruned = 0
+        seen = defaultdict(set)  # (token position, characters used) -> nodes expanded in that state
+        stack = [(self.root, 0, 0)]
+        while stack:
+            node, pos, used = stack.pop()
+            expanded = seen[pos, used]
+            if node in expanded:
+                continue
+            expanded.add(node)
+            visited += 1
+            longest = max_rest[pos]
+            if node.max_depth < min_rest[pos] or (longest is not None and node.min_depth > longest - used):
+                pruned += 1  # No word below this node has a length the rest of the pattern allows
+                continue
+            if pos == count:
+                if node.is_terminal:
+                    yield node.word, node.frequency
+                continue
+            if pos == count - 1 and tokens[pos] == (GAP, None):
+                # A trailing unbounded gap matches every word below: walk the subtree directly,
+                # stopping at the subtrees another path already covered
+                if node.is_terminal:
+                    yield node.word, node.frequency
+                subtree = list(node.children.values())
+                while subtree:
+                    below = subtree.pop()
+                    if below in expanded:
+                        continue
+                    expanded.add(below)
+                    visited += 1
+                    if below.is_terminal:
+                        yield below.word, below.frequency
+                    subtree.extend(below.children.values())
+                continue
+            steps = self._gap_steps(tokens, node, pos, used)
+            if not steps:
+                pruned += 1
+            stack.extend(steps)
+        if counts is not None:
+            counts[0] += visited
+            counts[1] += pruned
+
+    def _iter_gap_ranked(self, pattern, counts):
+        """
+        Yield (word, frequency) for each word matching a pattern containing gaps
+        (%), best first: frequency descending, then alphabetically. The states
+        of _iter_gap_matches are expanded from a heap, highest subtree maximum
+        frequency first, and a word is yielded only once no unexpanded state
+        could hold a better one. Taking the first k results therefore expands
+        only the states whose bound can still reach the top k. counts is
+        updated when the generator finishes or is closed.
+        Time Complexity: O(s log s) for the s states expanded
+        """
+        tokens = pattern.tokens
+        count = len(tokens)
+        min_rest, max_rest = self._gap_limits(tokens)
+        visited = pruned = 0
+        seen = defaultdict(set)  # (token position, characters used) -> nodes expanded in that state
+        serial = itertools.count()  # Tie breaker, so that states never compare their nodes
+        # Entries: (-bound, 0, serial, node, pos, used) for states, (-frequency, 1, word) for
+        # words. A state sorts before a word of equal frequency, which it may still beat.
+        heap = [(-self.root.max_freq, 0, 0, self.root, 0, 0)]
+        try:
+            while heap:
+                entry = heapq.heappop(heap)
+                if entry[1]:
+                    yield entry[2], -entry[0]
+                    continue
+                _, _, _, node, pos, used = entry
+                expanded = seen[pos, used]
+                if node in expanded:
+                    continue
+                expanded.add(node)
+                visited += 1
+                longest = max_rest[pos]
+                if node.max_depth < min_rest[pos] or (longest is not None and node.min_depth > longest - used):
+                    pruned += 1
+                    continue
+                if pos == count:
+                    if node.is_terminal:
+                        heapq.heappush(heap, (-node.frequency, 1, node.word))
+                    continue
+                steps = self._gap_steps(tokens, node, pos, used)
+                if not steps:
+                    pruned += 1
+                for child, next_pos, next_used in steps:
+                    heapq.heappush(heap, (-child.max_freq, 0, next(serial), child, next_pos, next_used))
+        finally:
+            counts[0] += visited
+            counts[1] += pruned
+
+    def _walk_gap_top_k(self, pattern, k):
+        # The k best matches of a gap pattern, with (nodes visited, branches pruned)
+        counts = [0, 0]
+        ranked = self._iter_gap_ranked(pattern, counts)
+        matches = list(itertools.islice(ranked, k))
+        ranked.close()  # Records the counts
+        return matches, counts[0], counts[1]
+
+    def _walk_gap(self, pattern):
+        # All matches of a gap pattern, best first, with (nodes visited, branches pruned)
+        counts = [0, 0]
+        matches = sorted(self._iter_gap_matches(pattern, counts), key=lambda x: (-x[1], x[0]))
+        return matches, counts[0], counts[1]
+
+    def _walk_many(self, planned):
+        # Shared traversal of match_many: planned is [(CompiledPattern, matches list), ...];
+        # appends the matches of each pattern to its list and returns (nodes visited, branches pruned)
+        visited = pruned = 0
+        entries = []  # (tokens, matches list) of the patterns walked together
+        for pattern, matches in planned:
+            if pattern.has_gap:
+                gap_matches, gap_visited, gap_pruned = self._walk_gap(pattern)
+                matches.extend(gap_matches)
+                visited += gap_visited
+                pruned += gap_pruned
+            else:
+                entries.append((pattern.tokens, matches))
+        stack = [(self.root, 0, entries)] if entries else []
+        while stack:
+            node, depth, active = stack.pop()
+            visited += 1
+            literal = defaultdict(list)  # next character -> patterns needing it
+            wildcard = []  # patterns with '*' at this depth
+            classed = []  # (pattern, CharClass) for patterns with a class at this depth
+            for entry in active:
+                tokens = entry[0]
+                if len(tokens) == depth:
+                    if node.is_terminal:
+                        entry[1].append((node.word, node.frequency))
+                    continue
+                token = tokens[depth]
+                if token == '*':
+                    wildcard.append(entry)
+                elif isinstance(token, CharClass):
+                    classed.append((entry, token))
+                else:
+                    literal[token].append(entry)
+
+            if wildcard:
+                for char, child in node.children.items():
+                    group = wildcard + literal.get(char, [])
+                    group.extend(entry for entry, token in classed if token.contains(char))
+                    stack.append((child, depth + 1, group))
+            else:
+                for entry, token in classed:
+                    selected = token.select(node)
+                    if not selected:
+                        pruned += 1
+                    for char, _ in selected:
+                        literal[char].append(entry)
+                for char, group in literal.items():
+                    child = node.children.get(char)
+                    if child is not None:
+                        stack.append((child, depth + 1, group))
+                    else:
+                        pruned += 1
+        return visited, pruned
         
     def find_best_match(self, pattern):
         """
-        Find the best matching word for a pattern with wildcards (*).
-        Returns the word with highest frequency, or None if no match.
-        Time Complexity: O(n) where n is the number of nodes in the trie
+        Find the best matching word for a pattern with wildcards (*), classes
+        ([ce], [^ce]) and gaps (%), as in find_all_matches_with_freq.
+        Returns (word, frequency) with the highest frequency (ties broken
+        alphabetically, as in find_all_matches_with_freq), or None if no match.
+        Branch and bound: children are visited in order of their subtree maximum
+        frequency, and a branch is skipped when its bound cannot beat the best
+        match found so far. Short patterns are looked up in the answer table
+        first when it is enabled (see enable_answer_table).
+        Time Complexity: O(n) worst case, usually far fewer nodes are visited
         """
-        matches = self.find_all_matches_with_freq(pattern)
-        return matches[0] if matches else None
+        stats = self.query_stats
+        pattern = compile_pattern(pattern)
+        answers = self.answer_table.lookup(pattern.text) if self.answer_table is not None else None
+        if answers is not None:
+            if stats is not None:
+                stats.record_cache_hit('best')
+            return answers[0] if answers else None
+        key = ('best', pattern.text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            if stats is not None:
+                stats.record_cache_hit('best')
+            return cached[0]
+
+        start = time.perf_counter() if stats is not None else 0.0
+        trie, walk = self._plan(pattern)
+        result, visited, pruned = trie._walk_best(walk)
+        self.cache.put(key, (result,))
+        if stats is not None:
+            stats.record('best', pattern.text, time.perf_counter() - start, visited, pruned, int(result is not None))
+        return result
+
+    def _walk_best(self, pattern):
+        # Branch and bound traversal of find_best_match; returns (result, nodes visited, branches pruned)
+        if pattern.has_gap:
+            matches, visited, pruned = self._walk_gap_top_k(pattern, 1)
+            return (matches[0] if matches else None), visited, pruned
+        ordered = self.ordered_paths
+        visited = pruned = 0
+        tokens = pattern.tokens
+        length = len(tokens)
+        best_freq, best_word = -1, None
+        path = []  # Reusable buffer: path[d] is the character at depth d + 1
+        stack = [(self.root, 0, '')]
+        while stack:
+            node, i, char = stack.pop()
+            visited += 1
+            if i:
+                del path[i - 1:]
+                path.append(char)
+
+            if not node.min_depth <= length - i <= node.max_depth:
+                pruned += 1  # No word below this node has the length the pattern needs
+                continue
+            # The subtree cannot hold anything better than the current best
+            bound = node.max_freq
+            if node.lengths is not None:
+                words = node.lengths.get(length - i)  # Only words of the remaining length can match
+                if words is None:
+                    pruned += 1
+                    continue
+                bound = min(bound, words[2])
+            if bound < best_freq or (bound == best_freq and
+                                     (best_word is None or ordered and ''.join(path) > best_word)):
+                pruned += 1
+                continue
+            if i == length:
+                if node.is_terminal and (node.frequency > best_freq or
+                                         (node.frequency == best_freq and node.word < best_word)):
+                    best_freq, best_word = node.frequency, node.word
+                continue
+            token = tokens[i]
+            if token == '*' or isinstance(token, CharClass):
+                candidates = node.children.items() if token == '*' else token.select(node)
+                if not candidates:
+                    pruned += 1
+                # Pushed in reverse so the highest bound (then lowest letter) is popped first
+                children = sorted(candidates, key=lambda item: (-item[1].max_freq, item[0]), reverse=True)
+                for child_char, child in children:
+                    stack.append((child, i + 1, child_char))
+            else:
+                child = node.children.get(token)
+                if child is not None:
+                    stack.append((child, i + 1, token))
+                else:
+                    pruned += 1
+
+        result = (best_word, best_freq) if best_word is not None else None
+        return result, visited, pruned
         
+    def find_top_k_matches(self, pattern, k=None, with_total=False):
+        """
+        Find the k highest-frequency words matching a pattern with wildcards (*).
+        Returns a list of (word, frequency) in the same order as
+        find_all_matches_with_freq. If k is None, every match is returned.
+        A bounded min-heap holds the current top k while the trie is traversed,
+        so memory is O(k) and selection is O(n log k). Once the heap is full,
+        branches whose subtree maximum frequency cannot beat heap[0] are skipped.
+        If with_total is True, returns (matches, total_frequency, match_count)
+        over all matches (see match_summary).
+        Time Complexity: O(n log k) where n is the number of nodes visited
+        """
+        if k is None:
+            matches = self.find_all_matches_with_freq(pattern)
+            if with_total:
+                return matches, sum(freq for _, freq in matches), len(matches)
+            return matches
+        return self._select_top_k(pattern, k, with_total, 'top')
+
+    def match_summary(self, pattern, k=10):
+        """
+        Summarize the words matching a pattern with wildcards (*) without
+        listing them all. Returns (total_frequency, match_count, top_k), where
+        top_k is the k best (word, frequency) pairs as in find_top_k_matches.
+        Each node stores the word count and frequency sum of its subtree and the
+        depths of its shallowest and deepest words, and nodes at most
+        LENGTH_TABLE_DEPTH deep also split them by word length. When the rest
+        of the pattern is only wildcards, a shallow node adds the totals for
+        the remaining length in one step, as does a deeper node whose words all
+        have that length. Its subtree is then only entered while it could still
+        improve the top k, best bound first.
+        Time Complexity: O(n log k) where n is the number of nodes visited
+        """
+        matches, total_frequency, match_count = self._select_top_k(pattern, k, True, 'summary')
+        return total_frequency, match_count, matches
+
+    def _select_top_k(self, pattern, k, with_total, query):
+        # Shared traversal of find_top_k_matches and match_summary
+        stats = self.query_stats
+        pattern = compile_pattern(pattern)
+        table = self.answer_table
+        if table is not None and not with_total and k <= table.k:
+            answers = table.lookup(pattern.text)
+            if answers is not None:
+                if stats is not None:
+                    stats.record_cache_hit(query)
+                return list(answers[:k])
+        key = ('top', pattern.text, k, with_total)
+        cached = self.cache.get(key)
+        if cached is not None:
+            if stats is not None:
+                stats.record_cache_hit(query)
+            matches, total_frequency, match_count = cached
+            return (list(matches), total_frequency, match_count) if with_total else list(matches)
+
+        start = time.perf_counter() if stats is not None else 0.0
+        trie, walk = self._plan(pattern)
+        matches, total_frequency, match_count, visited, pruned = trie._walk_top_k(walk, k, with_total)
+        self.cache.put(key, (tuple(matches), total_frequency, match_count))
+        if stats is not None:
+            stats.record(query, pattern.text, time.perf_counter() - start, visited, pruned, len(matches))
+        if with_total:
+            return matches, total_frequency, match_count
+        return matches
+
+    def _walk_top_k(self, pattern, k, with_total):
+        # Traversal of _select_top_k; returns (matches, total frequency, match count, visited, pruned)
+        if pattern.has_gap:
+            if not with_total:
+                matches, visited, pruned = self._walk_gap_top_k(pattern, k)
+                return matches, 0, 0, visited, pruned
+            counts = [0, 0]
+            matches = list(self._iter_gap_matches(pattern, counts))
+            top = heapq.nsmallest(k, matches, key=lambda x: (-x[1], x[0]))
+            return top, sum(freq for _, freq in matches), len(matches), counts[0], counts[1]
+        ordered = self.ordered_paths
+        visited = pruned = 0
+        heap = []  # min-heap of _RankedMatch, weakest kept match at heap[0]
+        total_frequency = match_count = 0
+        tokens = pattern.tokens
+        length = len(tokens)
+        wildcards_from = length  # tokens[wildcards_from:] is all wildcards
+        while wildcards_from and tokens[wildcards_from - 1] == '*':
+            wildcards_from -= 1
+        path = []  # Reusable buffer: path[d] is the character at depth d + 1
+        # Stack entries: (node, pattern index, edge character, subtree already counted in totals)
+        stack = [(self.root, 0, '', not with_total)] if k > 0 or with_total else []
+        while stack:
+            node, i, char, counted = stack.pop()
+            visited += 1
+            if i:
+                del path[i - 1:]
+                path.append(char)
+
+            # No word below this node has the length the pattern needs
+            remaining = length - i
+            if not node.min_depth <= remaining <= node.max_depth:
+                pruned += 1
+                continue
+            bound = node.max_freq
+            lengths = node.lengths
+            if lengths is not None:
+                # Shallow node: exact totals and maximum for the words of the remaining length
+                words = lengths.get(remaining)
+                if words is None:
+                    pruned += 1
+                    continue
+                bound = min(bound, words[2])
+                if not counted and i >= wildcards_from:
+                    match_count += words[0]
+                    total_frequency += words[1]
+                    counted = True
+            # Every word below matches: take the totals from the node's aggregates
+            elif not counted and i >= wildcards_from and node.min_depth == node.max_depth:
+                total_frequency += node.freq_sum
+                match_count += node.term_count
+                counted = True
+            if counted:
+                if k == 0:
+                    continue
+                if len(heap) == k:
+                    worst = heap[0]
+                    if bound < worst.frequency or (bound == worst.frequency and
+                                                   ordered and ''.join(path) > worst.word):
+                        pruned += 1
+                        continue
+            if i == length:
+                if node.is_terminal:
+                    if not counted:
+                        total_frequency += node.frequency
+                        match_count += 1
+                    entry = _RankedMatch(node.frequency, node.word)
+                    if len(heap) < k:
+                        heapq.heappush(heap, entry)
+                    elif heap and heap[0] < entry:
+                        heapq.heapreplace(heap, entry)
+                continue
+            token = tokens[i]
+            if token == '*' or isinstance(token, CharClass):
+                candidates = node.children.items() if token == '*' else token.select(node)
+                if not candidates:
+                    pruned += 1
+                if counted:
+                    # Only the top k is left to find: pop the highest bound (then lowest letter) first
+                    candidates = sorted(candidates, key=lambda item: (-item[1].max_freq, item[0]),
+                                        reverse=True)
+                for child_char, child in candidates:
+                    stack.append((child, i + 1, child_char, counted))
+            else:
+                child = node.children.get(token)
+                if child is not None:
+                    stack.append((child, i + 1, token, counted))
+                else:
+                    pruned += 1
+
+        matches = [(entry.word, entry.frequency) for entry in sorted(heap, reverse=True)]
+        return matches, total_frequency, match_count, visited, pruned
+
+    def find_within_distance(self, word, max_edits=1, k=10):
+        """
+        Find words within max_edits insertions, deletions or substitutions of
+        word (Levenshtein distance), for OCR errors such as 'udderslakc' for
+        'udderslake'. A '*' in word matches any one character at no cost.
+        Returns up to k (word, frequency, distance) ranked by distance, then
+        frequency (descending), then alphabetically; k=None returns them all.
+        The trie is walked with one dynamic-programming row per node (the
+        distances between word's prefixes and the node's path). A subtree is
+        skipped when the smallest entry of its row exceeds max_edits, since no
+        word below can come back within budget, or when none of its words has
+        a length within max_edits of len(word).
+        Time Complexity: O(v * m) for v nodes visited and a word of length m
+        """
+        stats = self.query_stats
+        start = time.perf_counter() if stats is not None else 0.0
+        word = word.lower().strip()
+        length = len(word)
+        visited = pruned = 0
+        candidates = []
+        # Stack entries: (node, depth, DP row for the path to node)
+        stack = [(self.root, 0, list(range(length + 1)))]
+        while stack:
+            node, depth, row = stack.pop()
+            visited += 1
+            if node.is_terminal and row[length] <= max_edits:
+                candidates.append((node.word, node.frequency, row[length]))
+            for char, child in node.children.items():
+                # Words below child have depth + 1 + [min_depth, max_depth] characters
+                if (depth + 1 + child.max_depth < length - max_edits or
+                        depth + 1 + child.min_depth > length + max_edits):
+                    pruned += 1
+                    continue
+                next_row = [row[0] + 1]
+                for j in range(1, length + 1):
+                    w_char = word[j - 1]
+                    substitution = row[j - 1] + (w_char != char and w_char != '*')
+                    next_row.append(min(substitution, row[j] + 1, next_row[j - 1] + 1))
+                if min(next_row) <= max_edits:
+                    stack.append((child, depth + 1, next_row))
+                else:
+                    pruned += 1
+
+        candidates.sort(key=lambda x: (x[2], -x[1], x[0]))
+        if k is not None:
+            del candidates[k:]
+        if stats is not None:
+            stats.record('fuzzy', word, time.perf_counter() - start, visited, pruned, len(candidates))
+        return candidates
+
+    @_writer
+    def enable_suffix_trie(self):
+        """
+        Keep a second trie of the reversed words, updated on every edit, so
+        patterns with more fixed characters at the end than at the start (such
+        as '*er' or '**e') can be matched from the end instead of branching
+        across the whole first level of the trie. Results are identical either
+        way. Costs roughly the memory of a second trie.
+        Time Complexity: O(total characters) to build
+        """
+        if self.suffix_trie is None:
+            self.suffix_trie = _SuffixTrie()
+            self.suffix_trie.rebuild(self.index)
+
+    @_writer
+    def disable_suffix_trie(self):
+        """Drop the reversed-word trie; every pattern is matched from the start again."""
+        self.suffix_trie = None
+
+    @_writer
+    def enable_answer_table(self, max_length=4, k=1):
+        """
+        Precompute the k best matches of every wildcard pattern of at most
+        max_length characters (such as 'o*', 'he*', '*er' or 'a*l'), so
+        find_best_match, find_top_k_matches (up to k) and match_many answer
+        them with one dictionary lookup instead of a traversal. The table is
+        kept up to date on every edit: only the patterns of a changed word
+        that is max_length or shorter are refreshed. Each word of length L
+        gives 2^L - 1 patterns, so keep max_length small.
+        Returns answer_table_info().
+        Time Complexity: O(w * 2^L) to build for w words of length at most L
+        """
+        if (self.answer_table is None or self.answer_table.max_length != max_length or
+                self.answer_table.k != k):
+            self.answer_table = _AnswerTable(max_length, k)
+            self.answer_table.rebuild(self.index)
+        return self.answer_table_info()
+
+    @_writer
+    def disable_answer_table(self):
+        """Drop the precomputed answers; short patterns are walked again."""
+        self.answer_table = None
+
+    @_writer
+    def enable_completions(self):
+        """
+        Keep the best COMPLETION_LIST_SIZE words of its subtree at every node,
+        updated along the changed path on every edit, so complete() answers
+        k up to that size without expanding the subtree. Costs one tuple per
+        node (see memory_report) and slows down edits and bulk loads.
+        Time Complexity: O(n * K) to build, K being COMPLETION_LIST_SIZE
+        """
+        if not self.completion_lists:
+            self.completion_lists = True
+            for node in reversed(self._all_nodes()):
+                node.refresh_top()
+
+    @_writer
+    def disable_completions(self):
+        """Drop the completion lists; complete() expands the prefix's subtree again."""
+        if self.completion_lists:
+            self.completion_lists = False
+            for node in self._all_nodes():
+                del node.top
+
+    def _all_nodes(self):
+        # Every node, parents before children. Only the live trie reads the
+        # completion lists, so they are also set on nodes shared with snapshots.
+        order = [self.root]
+        for node in order:
+            order.extend(node.children.values())
+        return order
+
+    def answer_table_info(self):
+        """
+        Return {max_length, k, patterns, build_time_s, bytes} for the answer
+        table (see enable_answer_table), or None if it is disabled.
+        """
+        table = self.answer_table
+        if table is None:
+            return None
+        return {
+            "max_length": table.max_length,
+            "k": table.k,
+            "patterns": len(table.answers),
+            "build_time_s": table.build_time,
+            "bytes": table.memory_bytes(),
+        }
+
+    def _plan(self, pattern):
+        """
+        Choose the direction to walk a pattern. Returns (trie, pattern to walk):
+        the suffix trie and the reversed pattern when the suffix trie is enabled
+        and the pattern has a longer run of fixed characters at its end than at
+        its start, otherwise this trie and the pattern itself. Character classes
+        count as wildcards here. Patterns with gaps are always matched from the start.
+        """
+        if self.suffix_trie is not None and not pattern.has_gap:
+            fixed = [token != '*' and isinstance(token, str) for token in pattern.tokens]
+            if not all(fixed) and fixed[::-1].index(False) > fixed.index(False):
+                return self.suffix_trie, pattern.reversed()
+        return self, pattern
+
+    def enable_stats(self, slowest_limit=20):
+        """
+        Start recording per-query statistics (see stats and slowest_patterns).
+        While disabled the only cost is one attribute check per query.
+        """
+        if self.query_stats is None:
+            self.query_stats = QueryStats(slowest_limit)
+
+    def disable_stats(self):
+        """Stop recording query statistics and discard those collected."""
+        self.query_stats = None
+
+    def stats(self):
+        """
+        Return {query type: counters} for the queries recorded since enable_stats.
+        Query types: 'all' (find_all_matches_with_freq), 'best' (find_best_match),
+        'top' (find_top_k_matches), 'summary' (match_summary), 'many'
+        (match_many) and 'fuzzy' (find_within_distance). Counters: calls,
+        cache_hits, nodes_visited, branches_pruned, matches, time_s, avg_time_us.
+        Returns an empty dictionary while instrumentation is off.
+        """
+        return self.query_stats.summary() if self.query_stats is not None else {}
+
+    def slowest_patterns(self, n=10):
+        """Return the n slowest traversals as (seconds, query type, pattern, nodes visited)."""
+        return self.query_stats.slowest_patterns(n) if self.query_stats is not None else []
+
+    def cache_info(self):
+        """
+        Return hit/miss counters and current size of the pattern cache. Once a
+        snapshot has been taken, the counters of the latest snapshot's own
+        cache are included under "snapshot".
+        """
+        info = self.cache.info()
+        if self._snapshot is not None:
+            info["snapshot"] = self._snapshot.cache.info()
+        return info
+
+    def memory_report(self):
+        """
+        Profile the structure and estimated memory use of the trie.
+        Returns a dictionary with:
+          nodes, terminals       - node and word counts
+          nodes_by_depth         - {depth: number of nodes}
+          branching              - {number of children: number of nodes}
+          bytes                  - estimated bytes for node_objects, children_dicts,
+                                   words (stored word strings), index (the word
+                                   index table), completions (the per-node
+                                   completion lists) and answer_table (both 0
+                                   unless enabled), plus their total
+        One iterative pass over the nodes, so it also works on tries with
+        millions of words.
+        Time Complexity: O(n) where n is the number of nodes in the trie
+        """
+        nodes_by_depth = defaultdict(int)
+        branching = defaultdict(int)
+        nodes = terminals = children_bytes = word_bytes = completion_bytes = 0
+        stack = [(self.root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            nodes += 1
+            nodes_by_depth[depth] += 1
+            branching[len(node.children)] += 1
+            children_bytes += sys.getsizeof(node.children)
+            if self.completion_lists and (node.is_terminal or len(node.children) != 1):
+                completion_bytes += sys.getsizeof(node.top)  # Otherwise shared with the only child
+            if node.is_terminal:
+                terminals += 1
+                word_bytes += sys.getsizeof(node.word)
+                if self.completion_lists:
+                    completion_bytes += sys.getsizeof((-node.frequency, node.word))  # Its list entry
+            for child in node.children.values():
+                stack.append((child, depth + 1))
+
+        estimated = {
+            "node_objects": nodes * _measure_node_object(),
+            "children_dicts": children_bytes,
+            "words": word_bytes,  # The index keys are the same string objects
+            "index": sys.getsizeof(self.index) if self.index is not None else 0,
+            "completions": completion_bytes,
+            "answer_table": self.answer_table.memory_bytes() if self.answer_table is not None else 0,
+        }
+        estimated["total"] = sum(estimated.values())
+        return {
+            "nodes": nodes,
+            "terminals": terminals,
+            "nodes_by_depth": dict(sorted(nodes_by_depth.items())),
+            "branching": dict(sorted(branching.items())),
+            "bytes": estimated,
+        }
+
     def get_all_words(self):
         """
         Get all words in the trie with their frequencies.
@@ -150,15 +1881,14 @@ class PrefixTrie:
         Time Complexity: O(n) where n is the number of nodes in the trie
         """
         words = []
+        stack = [self.root]
         
-        def _collect_words(node, current_word):
+        # Explicit stack instead of recursion; terminal nodes carry their own word
+        while stack:
+            node = stack.pop()
             if node.is_terminal:
                 words.append((node.word, node.frequency))
-                
-            for char, child_node in node.children.items():
-                _collect_words(child_node, current_word + char)
-                
-        _collect_words(self.root, "")
+            stack.extend(node.children.values())
         
         # Sort by frequency (descending) then alphabetically
         words.sort(key=lambda x: (-x[1], x[0]))
@@ -197,30 +1927,158 @@ class PrefixTrie:
         Read keywords from a file and build the trie.
         File format: word,frequency (one per line)
         Clears existing trie before loading new data.
+        Malformed lines are skipped and reported (see bulk_load).
         """
         try:
-            self.root = TrieNode()
-            self.size = 0
-            
-            with open(filename, 'r', encoding='utf-8') as file:
-                for line in file:
-                    line = line.strip()
-                    if line:
-                        if ',' in line:
-                            parts = line.split(',')
-                            word = parts[0].strip()
-                            frequency = int(parts[1].strip()) if len(parts) > 1 else 1
-                        else:
-                            word = line
-                            frequency = 1
-                            
-                        if word:
-                            self.add_keyword(word, frequency)
+            malformed = self.bulk_load(filename)
+            if malformed:
+                print(f"Warning: skipped {len(malformed)} malformed line(s) in '{filename}':")
+                for line_number, line in malformed[:MALFORMED_REPORT_LIMIT]:
+                    print(f"  line {line_number}: {line!r}")
+                if len(malformed) > MALFORMED_REPORT_LIMIT:
+                    print(f"  ... and {len(malformed) - MALFORMED_REPORT_LIMIT} more")
                             
         except FileNotFoundError:
             print(f"Error: File '{filename}' not found.")
         except Exception as e:
             print(f"Error reading file: {e}")
+
+    @_writer
+    def bulk_load(self, filename):
+        """
+        Replace the trie's contents with the word,frequency pairs in a file.
+        The file is read in large blocks and parsed with str.partition, and the
+        trie is built in one pass by bulk_insert. Lines without a comma get
+        frequency 1; blank lines are ignored.
+        Returns a list of (line_number, line) for malformed lines, which are skipped.
+        Raises OSError (e.g. FileNotFoundError) if the file cannot be read.
+        Time Complexity: O(total characters in the file)
+        """
+        malformed = []
+        self.clear()
+        with open(filename, 'r', encoding='utf-8') as file:
+            self.bulk_insert(parse_keyword_blocks(file, malformed), normalized=True)
+        return malformed
+
+    @classmethod
+    def from_pairs(cls, pairs, cache_size=1024):
+        """
+        Build a new trie from an iterable of (word, frequency) pairs using bulk_insert.
+        Time Complexity: O(total characters), fastest when pairs are sorted by word
+        """
+        trie = cls(cache_size)
+        trie.bulk_insert(pairs)
+        return trie
+
+    @_writer
+    def bulk_insert(self, pairs, normalized=False):
+        """
+        Add many (word, frequency) pairs in one pass. Repeated words have their
+        frequencies added, as with add_keyword.
+        Instead of walking down from the root for every word, the path of the
+        previous word is kept and only the part after the common prefix is
+        descended or created; for sorted input each node is visited once.
+        Derived data (subtree maximums, pattern cache) is rebuilt once at the end.
+        normalized=True skips lower()/strip() when the caller already did it.
+        Time Complexity: O(total characters) for sorted input
+        """
+        # Millions of new nodes and completion lists would otherwise trigger
+        # repeated cyclic GC passes
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            self._bulk_insert_pairs(pairs, normalized)
+            self._rebuild_aggregates()
+            self.cache.clear()
+            if self.suffix_trie is not None:
+                self.suffix_trie.rebuild(self.index)
+            if self.answer_table is not None:
+                self.answer_table.rebuild(self.index)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def _bulk_insert_pairs(self, pairs, normalized):
+        generation = self.generation
+        path = self._writable_path("")  # Nodes along the previous word, path[i] at depth i
+        previous = ""
+        for word, frequency in pairs:
+            if not normalized:
+                word = word.lower().strip()
+            if not word:
+                continue
+
+            # Reuse the path shared with the previous word
+            common = 0
+            limit = min(len(word), len(previous))
+            while common < limit and word[common] == previous[common]:
+                common += 1
+            del path[common + 1:]
+
+            node = path[-1]
+            for depth, char in enumerate(word[common:], common + 1):
+                child = node.children.get(char)
+                if child is None:
+                    child = node.children[char] = TrieNode(generation)
+                    node.child_mask |= char_bit(char)
+                elif child.generation != generation:
+                    child = node.children[char] = self._copy_node(child, word[:depth])
+                path.append(child)
+                node = child
+
+            if not node.is_terminal:
+                self.size += 1
+                node.is_terminal = True
+                node.word = word
+                node.frequency = frequency
+                self.index[word] = node
+            else:
+                node.frequency += frequency
+            previous = word
+
+    def _rebuild_aggregates(self):
+        """
+        Recompute the derived per-node data (subtree maximum frequency, word
+        count, frequency sum, word depths and completion lists) for the whole trie in one
+        iterative pass, children before parents. Subtrees still shared with a
+        snapshot were not edited, so their data is already correct and they
+        are skipped.
+        Time Complexity: O(n) where n is the number of nodes in the trie
+        """
+        generation = self.generation
+        order = [self.root] if self.root.generation == generation else []
+        for node in order:  # Breadth-first: every parent is listed before its children
+            order.extend(child for child in node.children.values() if child.generation == generation)
+        shallow = self._shallow_nodes()
+        for node in reversed(order):
+            node.refresh_bounds()
+            node.refresh_totals()
+            depth = shallow.get(id(node))
+            if depth is not None:
+                node.refresh_lengths(depth == LENGTH_TABLE_DEPTH)
+            if self.completion_lists:
+                node.refresh_top()
+
+    def _shallow_nodes(self):
+        # {id(node): depth} for the nodes at most LENGTH_TABLE_DEPTH deep
+        depths = {id(self.root): 0}
+        level = [self.root]
+        for depth in range(1, LENGTH_TABLE_DEPTH + 1):
+            level = [child for node in level for child in node.children.values()]
+            depths.update((id(node), depth) for node in level)
+        return depths
+
+    @_writer
+    def clear(self):
+        """Remove every word from the trie."""
+        self.root = TrieNode(self.generation)
+        self.size = 0
+        self.index = {}
+        self.cache.clear()
+        if self.suffix_trie is not None:
+            self.suffix_trie = _SuffixTrie()
+        if self.answer_table is not None:
+            self.answer_table.rebuild(self.index)
             
     def write_keywords_to_file(self, filename):
         """
@@ -236,6 +2094,38 @@ class PrefixTrie:
         except Exception as e:
             print(f"Error writing file: {e}")
             
+    def freeze(self):
+        """
+        Compile the trie into a read-only FrozenTrie backed by flat arrays
+        (see trie_snapshot.py), for serving queries once loading is done.
+        The frozen copy does not follow later edits to this trie; call its
+        thaw() to get a mutable trie back.
+        Time Complexity: O(n log c) where n is the number of nodes
+        """
+        return FrozenTrie(self.root, self.size)
+
+    def save_snapshot(self, path):
+        """
+        Save the trie to a compact, versioned binary snapshot (see trie_snapshot.py)
+        that load_snapshot can memory-map.
+        Time Complexity: O(n log c) where n is the number of nodes
+        """
+        try:
+            write_snapshot(self.root, self.size, path)
+        except Exception as e:
+            print(f"Error writing snapshot: {e}")
+
+    @staticmethod
+    def load_snapshot(path, verify=True):
+        """
+        Open a snapshot written by save_snapshot as a read-only MappedTrie.
+        Nodes are read from the memory-mapped file on demand, so loading is near
+        instant and the pages are shared between processes. verify=False skips
+        the checksum over the file body.
+        Raises trie_snapshot.SnapshotError if the file is missing, corrupt or of another version.
+        """
+        return MappedTrie(path, verify)
+
     def write_trie_to_file(self, filename):
         """
         Write the trie structure to a file in a readable format.
@@ -280,4 +2170,201 @@ class PrefixTrie:
         
     def __repr__(self):
         """Detailed string representation of the trie."""
-        return f"PrefixTrie(size={self.size}, words={[word for word, _ in self.get_all_words()[:10]]}{'...' if self.size > 10 else ''})"
\ No newline at end of file
+        return f"PrefixTrie(size={self.size}, words={[word for word, _ in self.get_all_words()[:10]]}{'...' if self.size > 10 else ''})"
+
+class _SuffixTrie(PrefixTrie):
+    """
+    Trie of reversed words kept alongside a PrefixTrie (see
+    PrefixTrie.enable_suffix_trie) and queried with reversed patterns.
+    Each terminal node stores the forward word, so matches come out as
+    forward words and frequency ties are broken on them exactly as in the
+    forward trie. Paths spell words backwards, so they are not used to
+    order words during pruning. It keeps no completion lists.
+    """
+    ordered_paths = False
+
+    def __init__(self):
+        super().__init__(cache_size=0)
+
+    def mirror(self, word, count_delta, freq_delta):
+        """Apply an edit made to the forward trie (see PrefixTrie._word_changed)."""
+        reversed_word = word[::-1]
+        if count_delta < 0:
+            self.delete_keyword(reversed_word)
+        else:
+            self.add_keyword(reversed_word, freq_delta)
+            self.index[reversed_word].word = word
+
+    def rebuild(self, index):
+        """Rebuild from the word index of the forward trie."""
+        self.clear()
+        self.bulk_insert(sorted((word[::-1], node.frequency) for word, node in index.items()),
+                         normalized=True)
+        for reversed_word, node in self.index.items():
+            node.word = reversed_word[::-1]
+
+class _AnswerTable:
+    """
+    Precomputed top-k matches of every wildcard pattern of at most max_length
+    characters (see PrefixTrie.enable_answer_table). The patterns come from
+    the words themselves: a word of length L is matched by the 2^L - 1
+    patterns that replace at least one of its characters with '*', so a
+    pattern missing from the table has no match. A snapshot shares the
+    answers dictionary, and the table copies it before its next edit.
+    """
+    def __init__(self, max_length, k):
+        self.max_length = max_length
+        self.k = k
+        self.answers = {}  # pattern -> tuple of up to k (word, frequency), best first
+        self.shared = False  # True while a snapshot holds the same answers dictionary
+        self.build_time = 0.0  # Seconds taken by the last rebuild
+
+    @staticmethod
+    def patterns(word):
+        # Every pattern matching word that has at least one '*'
+        for mask in range(1, 1 << len(word)):
+            yield ''.join('*' if mask >> i & 1 else char for i, char in enumerate(word))
+
+    def lookup(self, pattern):
+        """
+        Return the stored matches of pattern (possibly empty), or None if the
+        table does not cover it: it is too long, has no '*', or uses classes
+        or gaps.
+        """
+        if (len(pattern) > self.max_length or '*' not in pattern or
+                '[' in pattern or GAP in pattern):
+            return None
+        return self.answers.get(pattern, ())
+
+    def rebuild(self, index):
+        """Recompute every answer from the word index of the trie."""
+        start = time.perf_counter()
+        matches = defaultdict(list)
+        for word, node in index.items():
+            if len(word) <= self.max_length:
+                entry = (word, node.frequency)
+                for pattern in self.patterns(word):
+                    matches[pattern].append(entry)
+        rank = lambda x: (-x[1], x[0])
+        self.answers = {pattern: tuple(heapq.nsmallest(self.k, found, key=rank))
+                        for pattern, found in matches.items()}
+        self.shared = False
+        self.build_time = time.perf_counter() - start
+
+    def update(self, word, trie):
+        """
+        Refresh the answers of word's patterns after it was added, deleted or
+        had its frequency changed in trie. A word that entered or rose is
+        merged into each answer; one that fell or left may let in a word the
+        table never held, so those patterns are walked again.
+        Time Complexity: O(2^m * k) where m is the length of the word
+        """
+        if len(word) > self.max_length:
+            return
+        if self.shared:
+            self.answers = dict(self.answers)
+            self.shared = False
+        node = trie.index.get(word)
+        frequency = node.frequency if node is not None else None
+        rank = lambda x: (-x[1], x[0])
+        for pattern in self.patterns(word):
+            old = self.answers.get(pattern, ())
+            kept = [entry for entry in old if entry[0] != word]
+            dropped = len(kept) < len(old) and (
+                frequency is None or frequency < next(freq for w, freq in old if w == word))
+            if dropped:
+                kept = trie._walk_top_k(compile_pattern(pattern), self.k, False)[0]
+            elif frequency is not None:
+                kept.append((word, frequency))
+                kept.sort(key=rank)
+                del kept[self.k:]
+            if kept:
+                self.answers[pattern] = tuple(kept)
+            else:
+                self.answers.pop(pattern, None)
+
+    def snapshot(self):
+        """Return a read-only table sharing these answers (copied by this table on its next edit)."""
+        copy = _AnswerTable(self.max_length, self.k)
+        copy.answers = self.answers
+        copy.build_time = self.build_time
+        copy.shared = self.shared = True
+        return copy
+
+    def memory_bytes(self):
+        """Estimated bytes of the answers dictionary, its keys and tuples (words are shared with the trie)."""
+        total = sys.getsizeof(self.answers)
+        for pattern, answers in self.answers.items():
+            total += sys.getsizeof(pattern) + sys.getsizeof(answers)
+            total += sum(sys.getsizeof(entry) for entry in answers)
+        return total
+
+class TrieSnapshot(PrefixTrie):
+    """
+    Immutable view of one version of a PrefixTrie, returned by
+    PrefixTrie.snapshot(). Its nodes are shared with the trie, which never
+    edits them again, so it can be queried from any thread while the trie is
+    being edited, with every query method of PrefixTrie. Edits raise
+    TypeError. Exact lookups walk the trie (the word index belongs to the
+    live trie), as does complete() (the completion lists are only kept up
+    to date for the live trie). The snapshot has its own thread-safe pattern
+    cache, the size of the trie's, and records its queries in the trie's
+    QueryStats.
+    """
+    def __init__(self, trie):
+        self.trie = trie  # The live trie this version was taken from
+        super().__init__(cache_size=0)
+        self.cache = SharedPatternCache(trie.cache.max_size)
+        self.root = trie.root
+        self.size = trie.size
+        self.index = None
+        self.ordered_paths = trie.ordered_paths
+        if trie.suffix_trie is not None:
+            self.suffix_trie = trie.suffix_trie.snapshot()
+        if trie.answer_table is not None:
+            self.answer_table = trie.answer_table.snapshot()
+
+    def _lookup(self, word):
+        # Terminal node of word, or None
+        path = self._path_to(word)
+        node = path[-1]
+        return node if len(path) == len(word) + 1 and node.is_terminal else None
+
+    def search_keyword(self, word):
+        """Return True if word is in this version. Time Complexity: O(m)"""
+        return bool(word) and self._lookup(word.lower().strip()) is not None
+
+    def get_frequency(self, word):
+        """Return the frequency of word in this version, or None. Time Complexity: O(m)"""
+        node = self._lookup(word.lower().strip()) if word else None
+        return node.frequency if node is not None else None
+
+    @classmethod
+    def from_pairs(cls, pairs, cache_size=1024):
+        """Return a snapshot of a new PrefixTrie built from (word, frequency) pairs."""
+        return PrefixTrie.from_pairs(pairs, cache_size).snapshot()
+
+    def snapshot(self):
+        """A snapshot never changes, so it is its own snapshot."""
+        return self
+
+    # Statistics are switched on and off on the live trie and shared by its snapshots
+    query_stats = property(lambda self: self.trie.query_stats, lambda self, value: None)
+
+    def enable_stats(self, slowest_limit=20):
+        """Start recording statistics on the trie this snapshot was taken from."""
+        self.trie.enable_stats(slowest_limit)
+
+    def disable_stats(self):
+        """Stop recording statistics on the trie this snapshot was taken from."""
+        self.trie.disable_stats()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("TrieSnapshot is read-only; edit the PrefixTrie it was taken from.")
+
+    add_keyword = delete_keyword = set_frequency = update_frequencies = _read_only
+    bulk_insert = bulk_load = read_keywords_from_file = clear = enable_suffix_trie = _read_only
+    enable_answer_table = enable_completions = disable_completions = _read_only
+
+    def __str__(self):
+        return f"TrieSnapshot(size={self.size})"
@@ -0,0 +1,609 @@
+# trie_snapshot.py
+# Binary snapshot format and frozen (array-backed) form of the prefix trie
+# Shu Zhi and Ashley
+# DAAA/2A/03
+
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import deque
+from heapq import heappop, heappush
+from itertools import islice
+
+# File layout (all integers in native byte order, sections 8-byte aligned):
+#   header       : magic, version, byte-order marker, node count, word count, CRC32 of the body
+#   child_start  : uint32[node_count + 1]  CSR offsets - children of node i are nodes
+#                                          child_start[i] .. child_start[i + 1] - 1
+#   labels       : uint32[node_count]      code point of the edge leading into each node
+#   frequencies  : int64[node_count]       word frequency, or -1 if the node is not terminal
+#   max_freqs    : int64[node_count]       highest terminal frequency in each subtree
+# Nodes are numbered in breadth-first order with siblings sorted by label, so
+# the children of a node are contiguous and can be binary searched.
+# FrozenTrie uses the same numbering for its in-memory arrays.
+
+SNAPSHOT_MAGIC = b"PTRIESNP"
+SNAPSHOT_VERSION = 1
+_BYTE_ORDER_MARK = 0x01020304
+_HEADER = struct.Struct("=8sIIQQI")
+_HEADER_SIZE = 64
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is missing, corrupt or of an unsupported version."""
+
+def _compile(pattern):
+    # Parsed pattern, see trie.compile_pattern
+    from trie import compile_pattern  # Imported here because trie imports this module
+    return compile_pattern(pattern)
+
+def _aligned(nbytes):
+    return (nbytes + 7) & ~7
+
+def _section_sizes(node_count):
+    return (_aligned((node_count + 1) * 4), _aligned(node_count * 4), node_count * 8, node_count * 8)
+
+def compile_arrays(root):
+    """
+    Flatten the trie rooted at root into the snapshot sections:
+    (child_start, labels, frequencies, max_freqs).
+    Time Complexity: O(n log c) where n is the number of nodes and c the branching factor
+    """
+    child_start = array("I")
+    labels = array("I", [0])
+    frequencies = array("q")
+    max_freqs = array("q")
+
+    # Breadth-first numbering: node ids are handed out in the order nodes are queued
+    queue = deque([root])
+    next_id = 1
+    while queue:
+        node = queue.popleft()
+        child_start.append(next_id)
+        frequencies.append(node.frequency if node.is_terminal else -1)
+        max_freqs.append(node.max_freq)
+        for char in sorted(node.children):
+            labels.append(ord(char))
+            queue.append(node.children[char])
+            next_id += 1
+    child_start.append(next_id)
+    return child_start, labels, frequencies, max_freqs
+
+def write_snapshot(root, word_count, path):
+    """
+    Write the trie rooted at root to path in the snapshot format.
+    Time Complexity: O(n log c) where n is the number of nodes and c the branching factor
+    """
+    sections = compile_arrays(root)
+    node_count = len(sections[2])
+
+    body = bytearray()
+    for section in sections:
+        data = section.tobytes()
+        body += data + b"\0" * (_aligned(len(data)) - len(data))
+
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, _BYTE_ORDER_MARK,
+                          node_count, word_count, zlib.crc32(body))
+    with open(path, "wb") as file:
+        file.write(header.ljust(_HEADER_SIZE, b"\0"))
+        file.write(body)
+
+class _ArrayQueries:
+    """
+    Queries shared by MappedTrie and FrozenTrie, written against their common
+    breadth-first node numbering: the child_start, frequencies and max_freqs
+    arrays, plus each class's _child(node, char), _label(node) and
+    _iter_words().
+    """
+    def thaw(self, cache_size=1024):
+        """
+        Return a new mutable PrefixTrie with the same words and frequencies.
+        Time Complexity: O(n) where n is the number of nodes in the trie
+        """
+        from trie import PrefixTrie  # Imported here because trie imports this module
+        # Words come out in alphabetical order, the fast path of bulk_insert
+        return PrefixTrie.from_pairs(self._iter_words(), cache_size)
+
+    def _find(self, word):
+        # Node reached by spelling word from the root, or -1
+        node = 0
+        for char in word:
+            node = self._child(node, char)
+            if node < 0:
+                break
+        return node
+
+    def get_frequency(self, word):
+        """
+        Return the frequency of word, or None if it is not in the trie.
+        Time Complexity: O(m) where m is the length of the word
+        """
+        if not word:
+            return None
+        node = self._find(word.lower().strip())
+        if node < 0 or self.frequencies[node] < 0:
+            return None
+        return self.frequencies[node]
+
+    def _iter_ranked(self, node, path, tokens):
+        # Yields (word, frequency) for the words below node (whose path spells path),
+        # best first: frequency descending, then alphabetically. With tokens (no
+        # gaps), only the words whose rest matches them; with tokens None, every word.
+        # Heap entries: (-frequency or -subtree bound, word or path, 0 for a word or
+        # 1 for a subtree, node, pattern index). A path sorts before the words below
+        # it, so a subtree is expanded before a word of equal frequency it may beat.
+        child_start, frequencies, max_freqs = self.child_start, self.frequencies, self.max_freqs
+        length = None if tokens is None else len(tokens)
+        heap = [(-max_freqs[node], path, 1, node, 0)] if max_freqs[node] >= 0 else []
+        while heap:
+            bound, text, is_subtree, node, i = heappop(heap)
+            if not is_subtree:
+                yield text, -bound
+                continue
+            if i == length or tokens is None:
+                if frequencies[node] >= 0:
+                    heappush(heap, (-frequencies[node], text, 0, node, i))
+                if tokens is not None:
+                    continue
+            token = None if tokens is None else tokens[i]
+            if isinstance(token, str) and token != '*':
+                children = [self._child(node, token)]
+            else:
+                children = range(child_start[node], child_start[node + 1])
+            for child in children:
+                if child < 0 or max_freqs[child] < 0:
+                    continue
+                char = self._label(child)
+                if token is None or isinstance(token, str) or token.contains(char):
+                    heappush(heap, (-max_freqs[child], text + char, 1, child, i + 1))
+
+    def find_top_k_matches(self, pattern, k=None, with_total=False):
+        """
+        Find the k highest-frequency words matching a pattern, in the order of
+        find_all_matches_with_freq; k=None returns every match. Subtrees are
+        expanded best first by their maximum frequency, so only the branches
+        that can reach the top k are visited. If with_total is True, returns
+        (matches, total_frequency, match_count) over all matches (see match_summary).
+        Patterns with gaps (%) are tested against every word.
+        Time Complexity: O(v log v) for the v nodes expanded, O(n log n) with totals
+        """
+        if k is None or with_total:
+            matches = self.find_all_matches_with_freq(pattern)
+            if with_total:
+                return matches[:k], sum(freq for _, freq in matches), len(matches)
+            return matches
+        pattern = _compile(pattern)
+        if pattern.has_gap:
+            ranked = (entry for entry in self.get_all_words() if pattern.matches(entry[0]))
+        else:
+            ranked = self._iter_ranked(0, "", pattern.tokens)
+        return list(islice(ranked, k))
+
+    def match_summary(self, pattern, k=10):
+        """
+        Summarize the words matching a pattern: returns (total_frequency,
+        match_count, top_k) as PrefixTrie.match_summary does. Without per-node
+        totals every match is listed to count it.
+        Time Complexity: O(n log n) where n is the number of nodes in the trie
+        """
+        matches, total_frequency, match_count = self.find_top_k_matches(pattern, k, with_total=True)
+        return total_frequency, match_count, matches
+
+    def match_many(self, patterns, k=None):
+        """
+        Match several patterns, one query each. Returns {pattern: [(word,
+        frequency), ...]} ordered as in find_all_matches_with_freq (only the
+        first k if k is given).
+        Time Complexity: O(p * n) for p patterns
+        """
+        return {pattern: self.find_top_k_matches(pattern, k) for pattern in dict.fromkeys(patterns)}
+
+    def complete(self, prefix, k=10):
+        """
+        Return up to k (word, frequency) completions of prefix, best first as
+        in PrefixTrie.complete; k=None returns them all. The prefix's subtree
+        is expanded best first by its maximum frequencies.
+        Time Complexity: O(m + k * c log(k * c)), m the length of the prefix
+        """
+        prefix = prefix.lower().strip()
+        node = self._find(prefix)
+        if node < 0:
+            return []
+        return list(islice(self._iter_ranked(node, prefix, None), k))
+
+class MappedTrie(_ArrayQueries):
+    """
+    Read-only trie served directly from a memory-mapped snapshot file.
+    Opening only validates the header (and optionally the checksum); nodes are
+    read from the mapped pages on demand, so loading is near instant and
+    processes mapping the same file share its pages through the OS page cache.
+    Supports the query API of PrefixTrie: search_keyword, get_frequency,
+    find_all_matches_with_freq, find_best_match, find_top_k_matches,
+    match_summary, match_many, complete and get_all_words; thaw() returns a
+    mutable copy for editing.
+    """
+    def __init__(self, path, verify=True):
+        try:
+            with open(path, "rb") as file:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"Cannot map snapshot '{path}': {e}") from e
+
+        try:
+            self._load(verify)
+        except SnapshotError:
+            self._mmap.close()
+            raise
+
+    def _load(self, verify):
+        buffer = self._mmap
+        if len(buffer) < _HEADER_SIZE:
+            raise SnapshotError("Snapshot is truncated (missing header).")
+        magic, version, marker, node_count, word_count, crc = _HEADER.unpack_from(buffer, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise SnapshotError("Not a trie snapshot file (bad magic).")
+        if version != SNAPSHOT_VERSION:
+            raise SnapshotError(f"Unsupported snapshot version {version} (expected {SNAPSHOT_VERSION}).")
+        if marker != _BYTE_ORDER_MARK:
+            raise SnapshotError("Snapshot was written on a machine with a different byte order.")
+
+        sizes = _section_sizes(node_count)
+        if node_count < 1 or len(buffer) != _HEADER_SIZE + sum(sizes):
+            raise SnapshotError("Snapshot is truncated or has an inconsistent node count.")
+        view = memoryview(buffer)
+        if verify and zlib.crc32(view[_HEADER_SIZE:]) != crc:
+            view.release()
+            raise SnapshotError("Snapshot checksum mismatch (file is corrupt).")
+
+        offset = _HEADER_SIZE
+        sections = []
+        for size, count, typecode in zip(sizes, (node_count + 1, node_count, node_count, node_count),
+                                         ("I", "I", "q", "q")):
+            sections.append(view[offset:offset + count * array(typecode).itemsize].cast(typecode))
+            offset += size
+        self._view = view
+        self.child_start, self.labels, self.frequencies, self.max_freqs = sections
+        self.node_count = node_count
+        self.size = word_count
+
+    def close(self):
+        """Release the memory mapping."""
+        if self._mmap.closed:
+            return
+        for section in (self.child_start, self.labels, self.frequencies, self.max_freqs, self._view):
+            section.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _child(self, node, char):
+        # Binary search the sorted labels of node's children
+        lo, hi = self.child_start[node], self.child_start[node + 1]
+        code = ord(char)
+        index = bisect_left(self.labels, code, lo, hi)
+        if index < hi and self.labels[index] == code:
+            return index
+        return -1
+
+    def _label(self, node):
+        # Character on the edge into node
+        return chr(self.labels[node])
+
+    def search_keyword(self, word):
+        """
+        Return True if word is in the trie.
+        Time Complexity: O(m log c) where m is the length of the word
+        """
+        if not word:
+            return False
+        node = 0
+        for char in word.lower().strip():
+            node = self._child(node, char)
+            if node < 0:
+                return False
+        return self.frequencies[node] >= 0
+
+    def find_all_matches_with_freq(self, pattern):
+        """
+        Find all words matching a pattern with wildcards (*) and character
+        classes ([ce]), as (word, frequency) sorted by frequency (descending),
+        then alphabetically. Patterns with gaps (%) are tested against every word.
+        Time Complexity: O(n) where n is the number of nodes in the trie
+        """
+        pattern = _compile(pattern)
+        if pattern.has_gap:
+            return [(word, freq) for word, freq in self.get_all_words() if pattern.matches(word)]
+        tokens = pattern.tokens
+        child_start, labels, frequencies = self.child_start, self.labels, self.frequencies
+        results = []
+        stack = [(0, 0, "")]
+        while stack:
+            node, i, path = stack.pop()
+            if i == len(tokens):
+                if frequencies[node] >= 0:
+                    results.append((path, frequencies[node]))
+                continue
+            token = tokens[i]
+            if token == '*':
+                for child in range(child_start[node], child_start[node + 1]):
+                    stack.append((child, i + 1, path + chr(labels[child])))
+            elif isinstance(token, str):
+                child = self._child(node, token)
+                if child >= 0:
+                    stack.append((child, i + 1, path + token))
+            else:
+                for child in range(child_start[node], child_start[node + 1]):
+                    char = chr(labels[child])
+                    if token.contains(char):
+                        stack.append((child, i + 1, path + char))
+        results.sort(key=lambda x: (-x[1], x[0]))
+        return results
+
+    def find_best_match(self, pattern):
+        """
+        Find the (word, frequency) with the highest frequency matching a pattern
+        with wildcards (*) and character classes ([ce]), or None. Uses the
+        stored subtree maximum frequencies to skip branches that cannot beat the
+        best match so far. Patterns with gaps (%) are tested against every word.
+        Time Complexity: O(n) worst case, usually far fewer nodes are visited
+        """
+        pattern = _compile(pattern)
+        if pattern.has_gap:
+            return next((entry for entry in self.get_all_words() if pattern.matches(entry[0])), None)
+        tokens = pattern.tokens
+        child_start, labels = self.child_start, self.labels
+        frequencies, max_freqs = self.frequencies, self.max_freqs
+        best_freq, best_word = -1, None
+        stack = [(0, 0, "")]
+        while stack:
+            node, i, path = stack.pop()
+            bound = max_freqs[node]
+            if bound < best_freq or (bound == best_freq and (best_word is None or path > best_word)):
+                continue
+            if i == len(tokens):
+                freq = frequencies[node]
+                if freq >= 0 and (freq > best_freq or (freq == best_freq and path < best_word)):
+                    best_freq, best_word = freq, path
+                continue
+            token = tokens[i]
+            if isinstance(token, str) and token != '*':
+                child = self._child(node, token)
+                if child >= 0:
+                    stack.append((child, i + 1, path + token))
+                continue
+            children = range(child_start[node], child_start[node + 1])
+            if token != '*':
+                children = [child for child in children if token.contains(chr(labels[child]))]
+            # Push the most promising child last so it is explored first
+            for child in sorted(children, key=lambda c: (max_freqs[c], -labels[c])):
+                stack.append((child, i + 1, path + chr(labels[child])))
+        return (best_word, best_freq) if best_word is not None else None
+
+    def _iter_words(self):
+        # Yields (word, frequency) for every word in alphabetical order
+        child_start, labels, frequencies = self.child_start, self.labels, self.frequencies
+        stack = [(0, "")]
+        while stack:
+            node, path = stack.pop()
+            if frequencies[node] >= 0:
+                yield path, frequencies[node]
+            for child in range(child_start[node + 1] - 1, child_start[node] - 1, -1):
+                stack.append((child, path + chr(labels[child])))
+
+    def get_all_words(self):
+        """
+        Get all words with their frequencies, sorted by frequency (descending)
+        then alphabetically.
+        Time Complexity: O(n) where n is the number of nodes in the trie
+        """
+        words = list(self._iter_words())
+        words.sort(key=lambda x: (-x[1], x[0]))
+        return words
+
+    def __len__(self):
+        """Return the number of words in the snapshot."""
+        return self.size
+
+    def __str__(self):
+        return f"MappedTrie(size={self.size}, nodes={self.node_count})"
+
+class FrozenTrie(_ArrayQueries):
+    """
+    Read-only trie compiled into flat arrays instead of one Python object per
+    node: CSR child offsets, the edge labels as one string and 64-bit
+    frequencies, plus the subtree bounds (maximum frequency, shallowest and
+    deepest word) used for pruning. It takes a fraction of the memory of a
+    PrefixTrie and gives the garbage collector nothing to scan.
+    Built by PrefixTrie.freeze(); thaw() returns a mutable copy for editing.
+    Supports the query API of PrefixTrie: search_keyword, get_frequency,
+    find_all_matches_with_freq, find_best_match, find_top_k_matches,
+    match_summary, match_many, complete and get_all_words.
+    """
+    def __init__(self, root, word_count):
+        child_start = array("I")
+        labels = ["\0"]  # Root has no incoming edge
+        frequencies = array("q")
+        max_freqs = array("q")
+        min_depths = array("i")
+        max_depths = array("i")
+        by_bound = array("I", [0])  # by_bound[lo:hi] = children lo..hi-1 ordered by (-max_freq, label)
+
+        # Same breadth-first numbering as the snapshot format
+        queue = deque([root])
+        next_id = 1
+        while queue:
+            node = queue.popleft()
+            child_start.append(next_id)
+            frequencies.append(node.frequency if node.is_terminal else -1)
+            max_freqs.append(node.max_freq)
+            min_depths.append(node.min_depth)
+            max_depths.append(node.max_depth)
+            chars = sorted(node.children)
+            for char in chars:
+                labels.append(char)
+                queue.append(node.children[char])
+            order = sorted(range(len(chars)), key=lambda j: (-node.children[chars[j]].max_freq, chars[j]))
+            by_bound.extend(next_id + j for j in order)
+            next_id += len(chars)
+        child_start.append(next_id)
+
+        self.child_start = child_start
+        self.labels = "".join(labels)  # labels[i] is the character on the edge into node i
+        self.frequencies = frequencies
+        self.max_freqs = max_freqs
+        self.min_depths = min_depths
+        self.max_depths = max_depths
+        self.by_bound = by_bound
+        self.node_count = len(frequencies)
+        self.size = word_count
+
+    def _child(self, node, char):
+        # Sibling labels are contiguous, so a substring search finds the child
+        return self.labels.find(char, self.child_start[node], self.child_start[node + 1])
+
+    def _label(self, node):
+        # Character on the edge into node
+        return self.labels[node]
+
+    def _find(self, word):
+        # Node reached by spelling word from the root, or -1
+        child_start, labels = self.child_start, self.labels
+        node = 0
+        for char in word:
+            node = labels.find(char, child_start[node], child_start[node + 1])
+            if node < 0:
+                break
+        return node
+
+    def search_keyword(self, word):
+        """
+        Return True if word is in the trie.
+        Time Complexity: O(m) where m is the length of the word
+        """
+        if not word:
+            return False
+        node = self._find(word.lower().strip())
+        return node >= 0 and self.frequencies[node] >= 0
+
+    def find_all_matches_with_freq(self, pattern):
+        """
+        Find all words matching a pattern with wildcards (*) and character
+        classes ([ce]), as (word, frequency) sorted by frequency (descending),
+        then alphabetically. Patterns with gaps (%) are tested against every word.
+        Time Complexity: O(n) where n is the number of nodes in the trie
+        """
+        pattern = _compile(pattern)
+        if pattern.has_gap:
+            return [(word, freq) for word, freq in self.get_all_words() if pattern.matches(word)]
+        tokens = pattern.tokens
+        child_start, labels, frequencies = self.child_start, self.labels, self.frequencies
+        min_depths, max_depths = self.min_depths, self.max_depths
+        length = len(tokens)
+        results = []
+        stack = [(0, 0, "")]
+        while stack:
+            node, i, path = stack.pop()
+            if not min_depths[node] <= length - i <= max_depths[node]:
+                continue  # No word below this node has the length the pattern needs
+            if i == length:
+                if frequencies[node] >= 0:
+                    results.append((path, frequencies[node]))
+                continue
+            token = tokens[i]
+            if token == '*':
+                for child in range(child_start[node], child_start[node + 1]):
+                    stack.append((child, i + 1, path + labels[child]))
+            elif isinstance(token, str):
+                child = labels.find(token, child_start[node], child_start[node + 1])
+                if child >= 0:
+                    stack.append((child, i + 1, path + token))
+            else:
+                for child in range(child_start[node], child_start[node + 1]):
+                    if token.contains(labels[child]):
+                        stack.append((child, i + 1, path + labels[child]))
+        results.sort(key=lambda x: (-x[1], x[0]))
+        return results
+
+    def find_best_match(self, pattern):
+        """
+        Find the (word, frequency) with the highest frequency matching a pattern
+        with wildcards (*) and character classes ([ce]), ties broken
+        alphabetically, or None if no match. Branch and bound as in
+        PrefixTrie.find_best_match, with the children of each node stored
+        pre-sorted by their subtree maximum. Patterns with gaps (%) are tested
+        against every word.
+        Time Complexity: O(n) worst case, usually far fewer nodes are visited
+        """
+        pattern = _compile(pattern)
+        if pattern.has_gap:
+            return next((entry for entry in self.get_all_words() if pattern.matches(entry[0])), None)
+        tokens = pattern.tokens
+        child_start, labels, by_bound = self.child_start, self.labels, self.by_bound
+        frequencies, max_freqs = self.frequencies, self.max_freqs
+        min_depths, max_depths = self.min_depths, self.max_depths
+        length = len(tokens)
+        best_freq, best_word = -1, None
+        stack = [(0, 0, "")]
+        while stack:
+            node, i, path = stack.pop()
+            if not min_depths[node] <= length - i <= max_depths[node]:
+                continue
+            bound = max_freqs[node]
+            if bound < best_freq or (bound == best_freq and (best_word is None or path > best_word)):
+                continue
+            if i == length:
+                freq = frequencies[node]
+                if freq >= 0 and (freq > best_freq or (freq == best_freq and path < best_word)):
+                    best_freq, best_word = freq, path
+                continue
+            token = tokens[i]
+            if isinstance(token, str) and token != '*':
+                child = labels.find(token, child_start[node], child_start[node + 1])
+                if child >= 0:
+                    stack.append((child, i + 1, path + token))
+                continue
+            # Pushed in reverse so the most promising child is popped first
+            for j in range(child_start[node + 1] - 1, child_start[node] - 1, -1):
+                child = by_bound[j]
+                if token == '*' or token.contains(labels[child]):
+                    stack.append((child, i + 1, path + labels[child]))
+        return (best_word, best_freq) if best_word is not None else None
+
+    def _iter_words(self):
+        # Yields (word, frequency) for every word in alphabetical order
+        child_start, labels, frequencies = self.child_start, self.labels, self.frequencies
+        stack = [(0, "")]
+        while stack:
+            node, path = stack.pop()
+            if frequencies[node] >= 0:
+                yield path, frequencies[node]
+            for child in range(child_start[node + 1] - 1, child_start[node] - 1, -1):
+                stack.append((child, path + labels[child]))
+
+    def get_all_words(self):
+        """
+        Get all words with their frequencies, sorted by frequency (descending)
+        then alphabetically.
+        Time Complexity: O(n) where n is the number of nodes in the trie
+        """
+        words = list(self._iter_words())
+        words.sort(key=lambda x: (-x[1], x[0]))
+        return words
+
+    def memory_bytes(self):
+        """Return the approximate number of bytes held by the node arrays."""
+        arrays = (self.child_start, self.frequencies, self.max_freqs,
+                  self.min_depths, self.max_depths, self.by_bound)
+        return sum(a.itemsize * len(a) for a in arrays) + sys.getsizeof(self.labels)
+
+    def __len__(self):
+        """Return the number of words in the trie."""
+        return self.size
+
+    def __str__(self):
+        return f"FrozenTrie(size={self.size}, nodes={self.node_count})"